@@ -74,6 +74,31 @@ class BodyCompositionMLP(nn.Module):
         with torch.no_grad():
             self.net[-1].bias.copy_(torch.tensor([20.0, 60.0, 15.0]))
 
+    @torch.no_grad()
+    def _fuse_bn(self) -> None:
+        """Fold each eval-mode BatchNorm1d into the Linear that follows it.
+
+        The blocks are Linear → ReLU → BN → Dropout → Linear, so BN is an
+        affine map y = s * x + t (s = γ/√(σ²+ε), t = β - μ·s) applied to the
+        next Linear's input. Absorbing it gives W' = W·diag(s), b' = b + W·t.
+        BN and Dropout are then replaced with Identity. Only valid for
+        inference — call after loading weights and switching to eval().
+        """
+        for bn_idx, linear_idx in ((2, 4), (6, 8)):
+            bn = self.net[bn_idx]
+            if not isinstance(bn, nn.BatchNorm1d):
+                continue  # Already fused
+            linear = self.net[linear_idx]
+
+            scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+            shift = bn.bias - bn.running_mean * scale
+
+            linear.bias.add_(linear.weight @ shift)
+            linear.weight.mul_(scale.unsqueeze(0))
+
+            self.net[bn_idx] = nn.Identity()
+            self.net[bn_idx + 1] = nn.Identity()  # Dropout is a no-op in eval
+
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         """
         Args:
@@ -126,16 +151,13 @@ def cunbae_body_fat(bmi: float, age: int, sex: str) -> float:
     Where s = 1 for female, 0 for male.
     """
     s = 1.0 if sex == "female" else 0.0
+    # Same polynomial, grouped by powers of BMI
     return (
         -44.988
         + 0.503 * age
         + 10.689 * s
-        + 3.172 * bmi
-        - 0.026 * bmi * bmi
-        + 0.181 * bmi * s
-        - 0.02 * bmi * age
-        - 0.005 * bmi * bmi * s
-        + 0.00021 * bmi * bmi * age
+        + bmi * (3.172 + 0.181 * s - 0.02 * age)
+        + bmi * bmi * (-0.026 - 0.005 * s + 0.00021 * age)
     )
 
 
@@ -200,9 +222,21 @@ class BodyCompositionEstimator:
         else:
             self.device = device
 
-        self.mlp: Optional[BodyCompositionMLP] = None
+        self.mlp: Optional[nn.Module] = None
         self.has_pretrained = False
 
+        # Persistent (1, 14) input buffers, filled in place per call.
+        # On CUDA, features are staged in pinned host memory and copied async.
+        self._in_buf = torch.empty((1, 14), dtype=torch.float32, device=self.device)
+        self._in_buf_cpu = (
+            torch.empty((1, 14), dtype=torch.float32, pin_memory=True)
+            if torch.device(self.device).type == "cuda"
+            else self._in_buf
+        )
+        # NumPy view sharing the staging buffer's storage: per-element writes
+        # skip torch's dispatcher entirely
+        self._features = self._in_buf_cpu.numpy()[0]
+
         if weights_path and Path(weights_path).exists():
             try:
                 self.mlp = BodyCompositionMLP()
@@ -210,17 +244,30 @@ class BodyCompositionEstimator:
                 self.mlp.load_state_dict(state)
                 self.mlp.to(self.device)
                 self.mlp.eval()
+                self.mlp._fuse_bn()
                 self.has_pretrained = True
                 logger.info(f"Loaded body composition MLP from {weights_path}")
             except Exception as e:
                 logger.warning(f"Failed to load MLP weights: {e}")
                 self.mlp = None
         else:
-            # Initialize with random weights for development
-            self.mlp = BodyCompositionMLP()
-            self.mlp.to(self.device)
-            self.mlp.eval()
-            logger.info("Body composition MLP initialized (no pretrained weights)")
+            logger.warning("No body composition MLP weights, using formula estimates only")
+
+        # Dynamic INT8 quantization of the Linear layers (CPU kernels only)
+        if self.mlp is not None and torch.device(self.device).type == "cpu":
+            try:
+                self.mlp = torch.ao.quantization.quantize_dynamic(
+                    self.mlp, {nn.Linear}, dtype=torch.qint8
+                )
+            except Exception as e:
+                logger.warning(f"MLP dynamic quantization failed: {e}")
+
+        # TorchScript removes Python dispatch from the per-call forward
+        if self.mlp is not None:
+            try:
+                self.mlp = torch.jit.script(self.mlp)
+            except Exception as e:
+                logger.warning(f"MLP TorchScript compilation failed, using eager: {e}")
 
     def estimate(
         self,
@@ -252,35 +299,36 @@ class BodyCompositionEstimator:
             sex, age, height_cm, weight_kg, measurements
         )
 
-        # Try MLP prediction
-        if self.mlp is not None and self.has_pretrained:
-            try:
-                mlp_result = self._predict_mlp(betas, height_cm, weight_kg, age, sex)
-
-                # Validate MLP output against formula (sanity check)
-                bf_diff = abs(mlp_result.body_fat_pct - formula_result.body_fat_pct)
-                if bf_diff < 10.0:
-                    # MLP and formula roughly agree — trust MLP
-                    logger.info(
-                        f"Using MLP prediction: bf={mlp_result.body_fat_pct:.1f}% "
-                        f"(formula={formula_result.body_fat_pct:.1f}%)"
-                    )
-                    return mlp_result
-                else:
-                    # Large disagreement — use formula as safer option
-                    logger.warning(
-                        f"MLP/formula disagreement ({bf_diff:.1f}%), "
-                        f"falling back to formula"
-                    )
-                    return formula_result
+        # Formula-only fast path when no pretrained MLP is loaded
+        if self.mlp is None:
+            return formula_result
 
-            except Exception as e:
-                logger.warning(f"MLP prediction failed: {e}, using formula fallback")
+        # Try MLP prediction
+        try:
+            mlp_result = self._predict_mlp(betas, height_cm, weight_kg, age, sex)
+
+            # Validate MLP output against formula (sanity check)
+            bf_diff = abs(mlp_result.body_fat_pct - formula_result.body_fat_pct)
+            if bf_diff < 10.0:
+                # MLP and formula roughly agree — trust MLP
+                logger.info(
+                    f"Using MLP prediction: bf={mlp_result.body_fat_pct:.1f}% "
+                    f"(formula={formula_result.body_fat_pct:.1f}%)"
+                )
+                return mlp_result
+            else:
+                # Large disagreement — use formula as safer option
+                logger.warning(
+                    f"MLP/formula disagreement ({bf_diff:.1f}%), "
+                    f"falling back to formula"
+                )
                 return formula_result
 
-        return formula_result
+        except Exception as e:
+            logger.warning(f"MLP prediction failed: {e}, using formula fallback")
+            return formula_result
 
-    @torch.no_grad()
+    @torch.inference_mode()
     def _predict_mlp(
         self,
         betas: np.ndarray,
@@ -298,24 +346,18 @@ class BodyCompositionEstimator:
             - age: divide by 50
             - sex: 0 = male, 1 = female
         """
-        sex_val = 1.0 if sex == "female" else 0.0
-
-        features = np.concatenate([
-            betas.astype(np.float32),
-            np.array([
-                height_cm / 180.0,
-                weight_kg / 80.0,
-                age / 50.0,
-                sex_val,
-            ], dtype=np.float32),
-        ])
-
-        input_tensor = torch.tensor(features, dtype=torch.float32).unsqueeze(0).to(self.device)
-        output = self.mlp(input_tensor)[0]
-
-        body_fat_pct = output[0].item()
-        lean_mass_kg = output[1].item()
-        fat_mass_kg = output[2].item()
+        features = self._features
+        features[:10] = betas
+        features[10] = height_cm / 180.0
+        features[11] = weight_kg / 80.0
+        features[12] = age / 50.0
+        features[13] = 1.0 if sex == "female" else 0.0
+        if self._in_buf_cpu is not self._in_buf:
+            self._in_buf.copy_(self._in_buf_cpu, non_blocking=True)
+
+        # Single D→H transfer for all three outputs
+        out = self.mlp(self._in_buf)[0].cpu().numpy()
+        body_fat_pct, lean_mass_kg, fat_mass_kg = (float(v) for v in out)
 
         # Ensure physical consistency: fat + lean = total weight
         total_predicted = lean_mass_kg + fat_mass_kg
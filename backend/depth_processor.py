@@ -24,14 +24,16 @@ DEPTH_HEIGHT = 192
 
 
 def load_depth_map(
-    raw_bytes: bytes,
+    raw_bytes: bytes | bytearray | memoryview,
     width: int = DEPTH_WIDTH,
     height: int = DEPTH_HEIGHT,
 ) -> np.ndarray:
     """Load a raw float32 depth buffer into a numpy array.
 
     Args:
-        raw_bytes: Raw binary data (float32, row-major).
+        raw_bytes: Raw binary data (float32, row-major). A writable buffer
+                   (bytearray / memoryview over one) is wrapped without
+                   copying and masked in place.
         width: Depth map width (default 256 for iPhone LiDAR).
         height: Depth map height (default 192 for iPhone LiDAR).
 
@@ -46,10 +48,12 @@ def load_depth_map(
         )
 
     depth_map = np.frombuffer(raw_bytes, dtype=np.float32).reshape(height, width)
+    if not depth_map.flags.writeable:
+        depth_map = depth_map.copy()
 
-    # Filter invalid depth values
-    depth_map = np.where(depth_map > 0, depth_map, np.nan)
-    depth_map = np.where(depth_map < 10.0, depth_map, np.nan)  # Cap at 10m
+    # Filter invalid depth values (non-positive or beyond the 10m cap)
+    valid = (depth_map > 0) & (depth_map < 10.0)
+    depth_map[~valid] = np.nan
 
     return depth_map
 
@@ -76,17 +80,19 @@ def depth_to_point_cloud(
     Returns:
         (N, 3) array of valid 3D points in camera coordinate frame.
     """
-    h, w = depth_map.shape
-    u, v = np.meshgrid(np.arange(w), np.arange(h))
-
-    # Mask out invalid depth
-    valid = ~np.isnan(depth_map) & (depth_map > 0)
-
-    z = depth_map[valid]
-    x = (u[valid] - cx) * z / fx
-    y = (v[valid] - cy) * z / fy
-
-    points = np.stack([x, y, z], axis=-1).astype(np.float32)
+    w = depth_map.shape[1]
+    flat = depth_map.ravel()
+
+    # Flat indices of valid depth; pixel coords are recovered from these
+    # instead of materializing a full (H, W) meshgrid
+    valid_idx = np.flatnonzero(np.isfinite(flat) & (flat > 0))
+    v, u = np.divmod(valid_idx, w)
+
+    z = flat[valid_idx]
+    points = np.empty((z.size, 3), dtype=np.float32)
+    points[:, 0] = (u - cx) * z * (1.0 / fx)
+    points[:, 1] = (v - cy) * z * (1.0 / fy)
+    points[:, 2] = z
     return points
 
 
@@ -112,8 +118,14 @@ def estimate_scale_from_depth(
 
     # Use Y-axis extent as proxy for body height
     # (ARKit: Y is up in camera coordinates)
-    y_min = np.percentile(point_cloud[:, 1], 2)   # 2nd percentile (feet)
-    y_max = np.percentile(point_cloud[:, 1], 98)  # 98th percentile (head)
+    # 2nd / 98th percentiles (feet / head) via a single O(N) partition
+    ys = np.ascontiguousarray(point_cloud[:, 1])
+    last = ys.size - 1
+    k_lo = round(0.02 * last)
+    k_hi = round(0.98 * last)
+    parted = np.partition(ys, (k_lo, k_hi))
+    y_min = parted[k_lo]
+    y_max = parted[k_hi]
     observed_height = abs(y_max - y_min)
 
     if observed_height < 0.1:  # Less than 10cm — invalid
@@ -129,7 +141,7 @@ def estimate_scale_from_depth(
 
 
 def process_depth(
-    raw_bytes: bytes,
+    raw_bytes: bytes | bytearray | memoryview,
     intrinsics: dict,
     known_height_m: float,
     width: int = DEPTH_WIDTH,
@@ -6,7 +6,9 @@ Reference: 4D-Humans (Goel et al., 2023) — https://github.com/shubham-goel/4D-
 
 from __future__ import annotations
 
+import io
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -15,6 +17,7 @@ import torch
 import torch.nn as nn
 from PIL import Image
 from torchvision import transforms
+from torchvision.io import ImageReadMode, decode_jpeg
 
 from models import HMRPrediction
 
@@ -31,6 +34,13 @@ CAMERA_DIM = 3       # weak-perspective: [scale, tx, ty]
 IMAGENET_MEAN = [0.485, 0.456, 0.406]
 IMAGENET_STD = [0.229, 0.224, 0.225]
 
+# Built once; preprocess_image is called per request
+_HMR_TRANSFORM = transforms.Compose([
+    transforms.Resize((HMR_INPUT_SIZE, HMR_INPUT_SIZE), antialias=True),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD),
+])
+
 
 # ── Lightweight HMR Head (placeholder architecture) ───────────────────────
 
@@ -88,6 +98,34 @@ class HMRHead(nn.Module):
         return betas, thetas, camera
 
 
+class ViTEncoder(nn.Module):
+    """Encoder-only view of a torchvision ViT.
+
+    Runs patch projection → class-token prepend → transformer encoder and
+    returns the class-token embedding, skipping the classification heads.
+    Submodule names match torchvision's ViT so checkpoints load unchanged.
+    """
+
+    def __init__(self, vit: nn.Module):
+        super().__init__()
+        self.conv_proj = vit.conv_proj
+        self.class_token = vit.class_token
+        self.encoder = vit.encoder
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            images: (B, 3, H, W) normalized RGB images
+
+        Returns:
+            (B, hidden_dim) class token features
+        """
+        x = self.conv_proj(images).flatten(2).transpose(1, 2)  # (B, N, D)
+        class_token = self.class_token.expand(x.shape[0], -1, -1)
+        x = self.encoder(torch.cat([class_token, x], dim=1))
+        return x[:, 0]
+
+
 class HMRModel(nn.Module):
     """Full HMR 2.0 model: ViT-H backbone + regression head.
 
@@ -104,15 +142,9 @@ class HMRModel(nn.Module):
             from torchvision.models import vit_b_16, ViT_B_16_Weights
             backbone = vit_b_16(weights=ViT_B_16_Weights.DEFAULT)
             self.feat_dim = 768  # ViT-B hidden dim
-            # Remove the classification head, keep encoder
-            self.backbone = nn.Sequential(
-                backbone.conv_proj,
-                nn.Flatten(2),
-            )
-            # We'll use a simpler approach: process through the full ViT
-            # and take the class token output
-            self.vit = backbone
-            self.vit.heads = nn.Identity()  # Remove classification head
+            # Keep the encoder only and take the class token output
+            self.vit = ViTEncoder(backbone)
+            self.backbone = None  # CNN fallback only
         except Exception:
             logger.warning("ViT backbone not available, using simple CNN fallback")
             self.vit = None
@@ -177,15 +209,46 @@ def preprocess_image(image: Image.Image) -> torch.Tensor:
     Returns:
         Tensor of shape (1, 3, 256, 256).
     """
-    transform = transforms.Compose([
-        transforms.Resize((HMR_INPUT_SIZE, HMR_INPUT_SIZE)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD),
-    ])
-    tensor = transform(image.convert("RGB"))
+    tensor = _HMR_TRANSFORM(image.convert("RGB"))
     return tensor.unsqueeze(0)  # Add batch dim
 
 
+def decode_image(data: bytes, device: str = "cpu") -> torch.Tensor:
+    """Decode an uploaded image into a (3, H, W) uint8 RGB tensor.
+
+    JPEGs go through torchvision's libjpeg-turbo decoder, or nvJPEG when
+    ``device`` is CUDA so the pixels land directly on the GPU. Other formats
+    (and JPEGs torchvision rejects) fall back to PIL.
+
+    Args:
+        data: Raw encoded image bytes.
+        device: Device the decoded tensor should live on.
+
+    Returns:
+        uint8 tensor of shape (3, H, W) on ``device``.
+    """
+    if data[:2] == b"\xff\xd8":
+        try:
+            encoded = torch.frombuffer(bytearray(data), dtype=torch.uint8)
+            return decode_jpeg(encoded, mode=ImageReadMode.RGB, device=device)
+        except RuntimeError as e:
+            logger.warning(f"torchvision JPEG decode failed, using PIL: {e}")
+
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    return transforms.functional.pil_to_tensor(image).to(device)
+
+
+def _param_confidence(betas: np.ndarray, thetas: np.ndarray) -> np.ndarray:
+    """Confidence from SMPL parameter magnitude, per row.
+
+    Well-predicted bodies have moderate beta/theta values, so confidence
+    is high when the norms are small.
+    """
+    beta_mag = np.linalg.norm(betas, axis=-1)
+    theta_mag = np.linalg.norm(thetas, axis=-1)
+    return np.minimum(1.0, 1.0 / (1.0 + 0.1 * beta_mag + 0.01 * theta_mag))
+
+
 # ── Inference ──────────────────────────────────────────────────────────────
 
 class HMRInference:
@@ -195,52 +258,225 @@ class HMRInference:
         self,
         pretrained_path: Optional[str] = None,
         device: Optional[str] = None,
+        onnx_runtime: bool = False,
+        batched: bool = True,
     ):
+        """
+        Args:
+            pretrained_path: Path to pretrained HMR 2.0 weights.
+            device: Torch device. Auto-detects GPU if None.
+            onnx_runtime: Serve CPU inference through ONNX Runtime instead of
+                         PyTorch (requires the optional onnxruntime package).
+            batched: Run each batch as one forward. Disable for models that
+                     can't batch; on CUDA each image then gets its own
+                     forward on one of two streams so they still overlap.
+        """
         if device is None:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
 
+        # BF16 weights + activations on GPUs that support it (Ampere+) halve
+        # memory traffic; older GPUs use FP16 autocast over FP32 weights.
+        # CPU stays FP32.
+        is_cuda = torch.device(self.device).type == "cuda"
+        self.model_dtype = (
+            torch.bfloat16
+            if is_cuda and torch.cuda.is_bf16_supported()
+            else torch.float32
+        )
+        self.amp_dtype = (
+            torch.float16 if is_cuda and self.model_dtype == torch.float32 else None
+        )
+        # NHWC layout for faster conv_proj / CNN kernels on CUDA
+        self._memory_format = (
+            torch.channels_last
+            if torch.device(self.device).type == "cuda"
+            else torch.contiguous_format
+        )
+
+        # Batch preprocessing: resize to uint8 on host, normalize on device
+        self._transform = transforms.Compose([
+            transforms.Resize((HMR_INPUT_SIZE, HMR_INPUT_SIZE)),
+            transforms.PILToTensor(),
+        ])
+        self._mean = torch.tensor(IMAGENET_MEAN, device=self.device).view(1, 3, 1, 1)
+        self._std = torch.tensor(IMAGENET_STD, device=self.device).view(1, 3, 1, 1)
+
+        # Persistent batch buffers reused across predict_batch calls: uint8
+        # host staging (pinned on CUDA for async H2D), its uint8 device
+        # counterpart (CUDA only) and the float32 model input
+        self._max_batch = 32
+        batch_shape = (self._max_batch, 3, HMR_INPUT_SIZE, HMR_INPUT_SIZE)
+        self._host_batch = torch.empty(
+            batch_shape,
+            dtype=torch.uint8,
+            pin_memory=torch.device(self.device).type == "cuda",
+        )
+        self._dev_u8 = (
+            torch.empty(batch_shape, dtype=torch.uint8, device=self.device)
+            if torch.device(self.device).type == "cuda"
+            else None
+        )
+        self._dev_batch = torch.empty(
+            batch_shape,
+            dtype=torch.float32,
+            device=self.device,
+            memory_format=self._memory_format,
+        )
+
+        # PIL decode/resize releases the GIL, so batch images preprocess in parallel
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hmr-preprocess")
+
+        # Side stream for the forward, so callers can overlap CPU work
+        # (e.g. depth processing) between submit_batch and collect
+        self._stream = (
+            torch.cuda.Stream(device=self.device)
+            if torch.device(self.device).type == "cuda"
+            else None
+        )
+        # Per-image forward streams when batching is disabled
+        self._view_streams = (
+            [torch.cuda.Stream(device=self.device) for _ in range(2)]
+            if self._stream is not None and not batched
+            else None
+        )
+
         logger.info(f"Initializing HMR model on {self.device}")
         self.model = HMRModel(pretrained_path=pretrained_path)
-        self.model.to(self.device)
+        self.model.to(
+            self.device, dtype=self.model_dtype, memory_format=self._memory_format
+        )
         self.model.eval()
+
+        # Optional ONNX Runtime session for CPU deployments
+        self._session = None
+        if onnx_runtime:
+            if torch.device(self.device).type == "cpu":
+                self._session = self._export_onnx(self.model)
+            else:
+                logger.warning("ONNX Runtime requested on non-CPU device, ignoring")
+        if self._session is not None:
+            logger.info("HMR model ready (ONNX Runtime)")
+            return
+
+        # Dynamic INT8 quantization of the regressor GEMMs (CPU kernels only)
+        if torch.device(self.device).type == "cpu":
+            try:
+                self.model.head.regressor = torch.ao.quantization.quantize_dynamic(
+                    self.model.head.regressor, {nn.Linear}, dtype=torch.qint8
+                )
+            except Exception as e:
+                logger.warning(f"HMR regressor dynamic quantization failed: {e}")
+
+        self.model = self._compile(self.model)
         logger.info("HMR model ready")
 
-    @torch.no_grad()
-    def predict(self, image: Image.Image) -> HMRPrediction:
+    def _compile(self, model: nn.Module) -> nn.Module:
+        """Trace and freeze the model with TorchScript for inference.
+
+        Falls back to the eager model if tracing fails. The traced module is
+        warmed up with two dummy forwards so the JIT's profiling passes run
+        before the first real request.
+        """
+        example = torch.zeros(
+            1, 3, HMR_INPUT_SIZE, HMR_INPUT_SIZE,
+            dtype=self.model_dtype,
+            device=self.device,
+        ).contiguous(memory_format=self._memory_format)
+        try:
+            with torch.no_grad(), self._autocast():
+                traced = torch.jit.trace(model, example)
+                traced = torch.jit.optimize_for_inference(traced)
+                for _ in range(2):
+                    traced(example)
+            return traced
+        except Exception as e:
+            logger.warning(f"HMR TorchScript compilation failed, using eager: {e}")
+            return model
+
+    def _export_onnx(self, model: nn.Module):
+        """Export the model to ONNX and open a CPU ONNX Runtime session.
+
+        Returns None (keeping PyTorch inference) if onnxruntime is not
+        installed or the export fails.
+        """
+        try:
+            import onnxruntime as ort
+
+            example = torch.zeros(1, 3, HMR_INPUT_SIZE, HMR_INPUT_SIZE)
+            buffer = io.BytesIO()
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    (example,),
+                    buffer,
+                    input_names=["images"],
+                    output_names=["betas", "thetas", "camera"],
+                    dynamic_axes={
+                        name: {0: "batch"}
+                        for name in ("images", "betas", "thetas", "camera")
+                    },
+                    opset_version=17,
+                )
+            return ort.InferenceSession(
+                buffer.getvalue(), providers=["CPUExecutionProvider"]
+            )
+        except Exception as e:
+            logger.warning(f"ONNX Runtime export failed, using PyTorch: {e}")
+            return None
+
+    def _autocast(self) -> torch.autocast:
+        """Mixed-precision context for model forwards (no-op without amp_dtype)."""
+        return torch.autocast(
+            device_type=torch.device(self.device).type,
+            dtype=self.amp_dtype,
+            enabled=self.amp_dtype is not None,
+        )
+
+    def _forward(
+        self, batch: torch.Tensor
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Run the model in its compute dtype and return FP32 outputs."""
+        if self._session is not None:
+            outputs = self._session.run(None, {"images": batch.cpu().numpy()})
+            betas, thetas, camera = (torch.from_numpy(o) for o in outputs)
+            return betas, thetas, camera
+
+        with self._autocast():
+            betas, thetas, camera = self.model(batch.to(self.model_dtype))
+        return betas.float(), thetas.float(), camera.float()
+
+    def _preprocess_tensor(self, image: torch.Tensor) -> torch.Tensor:
+        """Resize + normalize a decoded (3, H, W) uint8 image on the device."""
+        batch = image.to(self.device).unsqueeze(0).float()
+        batch = transforms.functional.resize(
+            batch, [HMR_INPUT_SIZE, HMR_INPUT_SIZE], antialias=True
+        )
+        batch.div_(255.0).sub_(self._mean).div_(self._std)
+        return batch.contiguous(memory_format=self._memory_format)
+
+    def predict(self, image: Image.Image | torch.Tensor) -> HMRPrediction:
         """Run HMR inference on a single image.
 
         Args:
-            image: PIL RGB image (any size, will be resized to 256x256).
+            image: PIL RGB image, or a (3, H, W) uint8 tensor from
+                   decode_image (any size, will be resized to 256x256).
 
         Returns:
             HMRPrediction with SMPL betas, thetas, camera params.
         """
-        input_tensor = preprocess_image(image).to(self.device)
-
-        betas, thetas, camera = self.model(input_tensor)
-
-        # Compute confidence from parameter magnitude
-        # Well-predicted bodies have moderate beta/theta values
-        beta_mag = torch.norm(betas).item()
-        theta_mag = torch.norm(thetas).item()
-        # Confidence heuristic: high confidence when params are moderate
-        confidence = min(1.0, 1.0 / (1.0 + 0.1 * beta_mag + 0.01 * theta_mag))
-
-        return HMRPrediction(
-            betas=betas[0].cpu().numpy(),
-            thetas=thetas[0].cpu().numpy(),
-            camera=camera[0].cpu().numpy(),
-            confidence=confidence,
-        )
+        return self.predict_batch([image])[0]
 
-    @torch.no_grad()
-    def predict_batch(self, images: list[Image.Image]) -> list[HMRPrediction]:
-        """Run HMR inference on a batch of images.
+    @torch.inference_mode()
+    def predict_batch(
+        self, images: list[Image.Image | torch.Tensor]
+    ) -> list[HMRPrediction]:
+        """Run HMR inference on a batch of images in one forward pass.
 
         Args:
-            images: List of PIL RGB images.
+            images: List of PIL RGB images and/or (3, H, W) uint8 tensors
+                    from decode_image. Sizes may differ.
 
         Returns:
             List of HMRPrediction, one per image.
@@ -248,22 +484,115 @@ class HMRInference:
         if not images:
             return []
 
-        tensors = [preprocess_image(img) for img in images]
-        batch = torch.cat(tensors, dim=0).to(self.device)
+        return [
+            pred
+            for start in range(0, len(images), self._max_batch)
+            for pred in self.collect(
+                self.submit_batch(images[start:start + self._max_batch])
+            )
+        ]
 
-        betas, thetas, cameras = self.model(batch)
+    @torch.inference_mode()
+    def submit_batch(
+        self, images: list[Image.Image | torch.Tensor]
+    ) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """Queue a batched forward without waiting for it to finish.
 
-        results = []
-        for i in range(len(images)):
-            beta_mag = torch.norm(betas[i]).item()
-            theta_mag = torch.norm(thetas[i]).item()
-            confidence = min(1.0, 1.0 / (1.0 + 0.1 * beta_mag + 0.01 * theta_mag))
+        On CUDA the forward is enqueued on the HMR side stream and the
+        returned tensors are still being computed; pass them to collect()
+        once the caller has done its own CPU work.
 
-            results.append(HMRPrediction(
-                betas=betas[i].cpu().numpy(),
-                thetas=thetas[i].cpu().numpy(),
-                camera=cameras[i].cpu().numpy(),
-                confidence=confidence,
-            ))
+        Args:
+            images: Up to 32 PIL RGB images and/or decoded uint8 tensors.
 
-        return results
+        Returns:
+            (betas, thetas, cameras) device tensors for collect().
+        """
+        if len(images) > self._max_batch:
+            raise ValueError(
+                f"submit_batch takes at most {self._max_batch} images, got {len(images)}"
+            )
+        if self._stream is None:
+            return self._forward(self._preprocess_batch(images))
+
+        # Inputs (e.g. nvJPEG decodes) were produced on the current stream
+        self._stream.wait_stream(torch.cuda.current_stream(self.device))
+        with torch.cuda.stream(self._stream):
+            batch = self._preprocess_batch(images)
+            if self._view_streams is None:
+                return self._forward(batch)
+
+            # Unbatched: one forward per image, alternating between the view
+            # streams so the scheduler can overlap their kernels and launches
+            outputs = []
+            for i in range(len(batch)):
+                stream = self._view_streams[i % len(self._view_streams)]
+                stream.wait_stream(self._stream)
+                batch.record_stream(stream)
+                with torch.cuda.stream(stream):
+                    outputs.append(self._forward(batch[i:i + 1]))
+            for stream in self._view_streams:
+                self._stream.wait_stream(stream)
+            betas, thetas, cameras = zip(*outputs)
+            return torch.cat(betas), torch.cat(thetas), torch.cat(cameras)
+
+    def collect(
+        self, outputs: tuple[torch.Tensor, torch.Tensor, torch.Tensor]
+    ) -> list[HMRPrediction]:
+        """Wait for a submit_batch forward and split it into predictions."""
+        if self._stream is not None:
+            torch.cuda.current_stream(self.device).wait_stream(self._stream)
+        return self._predictions(*outputs)
+
+    def _preprocess_batch(
+        self, images: list[Image.Image | torch.Tensor]
+    ) -> torch.Tensor:
+        """Resize + normalize images into one (B, 3, 256, 256) device batch."""
+        if any(isinstance(image, torch.Tensor) for image in images):
+            # Decoded tensors may already be on the device: resize each there
+            return torch.cat([
+                self._preprocess_tensor(image)
+                if isinstance(image, torch.Tensor)
+                else preprocess_image(image).to(self.device)
+                for image in images
+            ]).contiguous(memory_format=self._memory_format)
+
+        n = len(images)
+        host_batch = self._host_batch[:n]
+
+        def stage(i: int) -> None:
+            host_batch[i] = self._transform(images[i].convert("RGB"))
+
+        # Each worker writes its own slice of the staging buffer
+        list(self._pool.map(stage, range(n)))
+
+        # Same-dtype uint8 H2D copy, so it stays async from pinned memory and
+        # moves 4x fewer bytes than float32; the conversion happens on device
+        batch_u8 = host_batch
+        if self._dev_u8 is not None:
+            batch_u8 = self._dev_u8[:n]
+            batch_u8.copy_(host_batch, non_blocking=True)
+        batch = self._dev_batch[:n]
+        torch.div(batch_u8, 255.0, out=batch)
+        batch.sub_(self._mean).div_(self._std)
+        return batch
+
+    def _predictions(
+        self, betas: torch.Tensor, thetas: torch.Tensor, cameras: torch.Tensor
+    ) -> list[HMRPrediction]:
+        """Split batched model outputs into per-image predictions."""
+        # One copy per output; confidences are computed from the host arrays
+        betas_np = betas.cpu().numpy()
+        thetas_np = thetas.cpu().numpy()
+        cameras_np = cameras.cpu().numpy()
+        confidences = _param_confidence(betas_np, thetas_np)
+
+        return [
+            HMRPrediction(
+                betas=betas_np[i],
+                thetas=thetas_np[i],
+                camera=cameras_np[i],
+                confidence=float(confidences[i]),
+            )
+            for i in range(len(betas_np))
+        ]
@@ -7,19 +7,22 @@ body measurements, composition, and 3D mesh data.
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
 
+import orjson
 import torch
 from fastapi import FastAPI, File, Form, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from PIL import Image
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from models import HealthResponse, ScanResponse, Sex
-from pipeline import ScanPipeline
+from hmr_inference import decode_image
+from models import HealthResponse, ScanMetadata, ScanResponse
+from pipeline import BatchedScanPipeline, ScanPipeline
 
 # ── Logging ──────────────────────────────────────────────────────────────
 
@@ -32,27 +35,92 @@ logger = logging.getLogger(__name__)
 # ── Global pipeline instance ─────────────────────────────────────────────
 
 pipeline: ScanPipeline | None = None
+scan_batcher: BatchedScanPipeline | None = None
+
+# Device availability doesn't change while the process runs
+GPU_AVAILABLE = torch.cuda.is_available()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize pipeline on startup, clean up on shutdown."""
-    global pipeline
+    global pipeline, scan_batcher
 
     logger.info("Starting NATEFIT GPU backend...")
     pipeline = ScanPipeline(
         hmr_weights_path=os.getenv("HMR_WEIGHTS_PATH"),
         smpl_model_path=os.getenv("SMPL_MODEL_PATH"),
         composition_weights_path=os.getenv("COMPOSITION_WEIGHTS_PATH"),
+        hmr_onnx_runtime=os.getenv("HMR_ONNX_RUNTIME") == "1",
+        allow_placeholder_mesh=os.getenv("NATEFIT_DEV") == "1",
+        hmr_batched=os.getenv("HMR_UNBATCHED") != "1",
+    )
+    # Concurrent scans arriving within the batch window share one HMR forward
+    scan_batcher = BatchedScanPipeline(
+        pipeline,
+        max_wait=float(os.getenv("SCAN_BATCH_WAIT_MS", "20")) / 1000.0,
     )
     logger.info("Pipeline ready")
 
+    # Load the extractor + composition models in the background so the
+    # server starts accepting requests as soon as HMR is up
+    warm_up = asyncio.create_task(run_in_threadpool(pipeline.warm_up))
+    warm_up.add_done_callback(_log_warm_up_failure)
+
     yield
 
     logger.info("Shutting down NATEFIT GPU backend")
+    await scan_batcher.close()
+    scan_batcher = None
     pipeline = None
 
 
+def _log_warm_up_failure(task: asyncio.Task) -> None:
+    """Report a failed background warm-up (scans retry the load, and
+    /health reports the error until one succeeds)."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Pipeline warm-up failed: {task.exception()}")
+
+
+# ── Upload decoding ──────────────────────────────────────────────────────
+
+def _read_buffer(upload: UploadFile) -> memoryview:
+    """Read an upload into a writable buffer.
+
+    The depth pipeline wraps this with np.frombuffer, so reading into a
+    bytearray lets it reuse the memory instead of copying the frame.
+    """
+    f = upload.file
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    buf = bytearray(size)
+    n = f.readinto(buf)
+    return memoryview(buf)[:n]
+
+
+def _decode_inputs(
+    front_image: UploadFile,
+    side_image: UploadFile,
+    depth_front: UploadFile | None,
+    depth_side: UploadFile | None,
+    device: str,
+) -> tuple[torch.Tensor, torch.Tensor, memoryview | None, memoryview | None]:
+    """Read and decode uploaded files.
+
+    Uploads are already fully spooled by the time the endpoint runs, so the
+    underlying file objects are read synchronously. Runs in a worker thread
+    so JPEG decoding doesn't block the event loop. Images are decoded
+    straight onto the HMR device (nvJPEG on CUDA).
+    """
+    front = decode_image(front_image.file.read(), device)
+    side = decode_image(side_image.file.read(), device)
+
+    depth_front_bytes = _read_buffer(depth_front) if depth_front else None
+    depth_side_bytes = _read_buffer(depth_side) if depth_side else None
+
+    return front, side, depth_front_bytes, depth_side_bytes
+
+
 # ── FastAPI app ──────────────────────────────────────────────────────────
 
 app = FastAPI(
@@ -60,15 +128,23 @@ app = FastAPI(
     description="SMPL-based body scanning with LiDAR depth support",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
+# FRONTEND_URL is optional; drop it when unset rather than allowing ""
+ALLOWED_ORIGINS = [
+    origin
+    for origin in (
         "http://localhost:3000",
         "https://natefit-liard.vercel.app",
         os.getenv("FRONTEND_URL", ""),
-    ],
+    )
+    if origin
+]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -79,12 +155,19 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint."""
-    return HealthResponse(
-        status="ok",
-        gpu_available=torch.cuda.is_available(),
-        model_loaded=pipeline is not None,
-    )
+    """Health check endpoint.
+
+    Hit at load-balancer ping rates, so it returns a plain dict directly
+    (response_model is only kept for the OpenAPI schema). model_loaded
+    stays false until the background warm-up has loaded every model, and
+    a failed load reports status "error".
+    """
+    load_error = pipeline.load_error if pipeline is not None else None
+    return ORJSONResponse({
+        "status": "error" if load_error is not None else "ok",
+        "gpu_available": GPU_AVAILABLE,
+        "model_loaded": pipeline is not None and pipeline.ready,
+    })
 
 
 @app.post("/api/scan", response_model=ScanResponse)
@@ -104,74 +187,67 @@ async def process_scan(
     Returns body measurements, composition, 3D mesh data, and confidence score.
     """
     if pipeline is None:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={"error": "Pipeline not initialized. Server starting up."},
         )
 
     try:
-        # Validate sex
-        sex_lower = sex.lower()
-        if sex_lower not in ("male", "female"):
-            return JSONResponse(
-                status_code=400,
-                content={"error": f"Invalid sex: {sex}. Must be 'male' or 'female'."},
+        # Validate sex + ranges in one pass against ScanMetadata's constraints
+        try:
+            metadata = ScanMetadata(
+                height_cm=height_cm,
+                weight_kg=weight_kg,
+                age=age,
+                sex=sex.lower(),
             )
-
-        # Validate ranges
-        if not (50 < height_cm < 300):
-            return JSONResponse(
+        except ValidationError as e:
+            return ORJSONResponse(
                 status_code=400,
-                content={"error": f"Height must be between 50-300 cm, got {height_cm}"},
-            )
-        if not (20 < weight_kg < 500):
-            return JSONResponse(
-                status_code=400,
-                content={"error": f"Weight must be between 20-500 kg, got {weight_kg}"},
-            )
-        if not (10 <= age <= 120):
-            return JSONResponse(
-                status_code=400,
-                content={"error": f"Age must be between 10-120, got {age}"},
+                content={"error": "; ".join(
+                    f"{err['loc'][0]}: {err['msg']}" for err in e.errors()
+                )},
             )
 
-        # Load images
-        front_bytes = await front_image.read()
-        side_bytes = await side_image.read()
-
-        front_pil = Image.open(__import__("io").BytesIO(front_bytes)).convert("RGB")
-        side_pil = Image.open(__import__("io").BytesIO(side_bytes)).convert("RGB")
-
-        # Load depth data (if provided)
-        depth_front_bytes = await depth_front.read() if depth_front else None
-        depth_side_bytes = await depth_side.read() if depth_side else None
+        # Load images + depth data (if provided)
+        front, side, depth_front_bytes, depth_side_bytes = await run_in_threadpool(
+            _decode_inputs,
+            front_image,
+            side_image,
+            depth_front,
+            depth_side,
+            pipeline.hmr.device,
+        )
 
         # Parse camera intrinsics
         intrinsics = None
         if camera_intrinsics:
             try:
-                intrinsics = json.loads(camera_intrinsics)
-            except json.JSONDecodeError:
+                intrinsics = orjson.loads(camera_intrinsics)
+            except orjson.JSONDecodeError:
                 logger.warning("Invalid camera intrinsics JSON, ignoring")
 
-        # Run pipeline
-        result = pipeline.process(
-            front_image=front_pil,
-            side_image=side_pil,
-            height_cm=height_cm,
-            weight_kg=weight_kg,
-            age=int(age),
-            sex=sex_lower,
+        # Run pipeline (batched with any concurrent scans)
+        result = await scan_batcher.process(
+            front_image=front,
+            side_image=side,
+            height_cm=metadata.height_cm,
+            weight_kg=metadata.weight_kg,
+            age=metadata.age,
+            sex=metadata.sex.value,
             depth_front_bytes=depth_front_bytes,
             depth_side_bytes=depth_side_bytes,
             camera_intrinsics=intrinsics,
         )
 
-        return result
+        # Returning the response directly skips FastAPI re-validating the
+        # mesh against response_model (kept for the OpenAPI schema);
+        # ORJSONResponse writes the numpy mesh arrays without tolist()
+        return ORJSONResponse(dict(result))
 
     except Exception as e:
         logger.exception("Scan processing failed")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Scan processing failed: {str(e)}"},
         )
@@ -9,10 +9,14 @@ SMPL mesh has 6890 vertices and 13776 faces.
 
 from __future__ import annotations
 
+import functools
 import logging
 from typing import Optional
 
 import numpy as np
+import scipy.sparse
+import scipy.sparse.csgraph
+import torch
 import trimesh
 
 from models import MeasurementSet
@@ -96,43 +100,92 @@ LANDMARKS = {
 }
 
 
-def _get_smpl_mesh(
-    betas: np.ndarray,
-    smpl_model_path: Optional[str] = None,
-) -> tuple[np.ndarray, np.ndarray]:
-    """Generate SMPL mesh in T-pose from shape parameters.
+# ── Placeholder mesh segments ─────────────────────────────────────────────
+# Body shape for the development placeholder mesh, as one flat table so the
+# vertices can be generated in a single vectorized pass.
 
-    Args:
-        betas: (10,) SMPL shape parameters.
-        smpl_model_path: Path to SMPL model .npz file. If None, generates
-                        a synthetic placeholder mesh for development.
+_PLACEHOLDER_N_VERTS = 6890
+_PLACEHOLDER_N_FACES = 13776
+
+_BODY_SEGMENTS = [
+    # (y_start, y_end, num_verts, radius_x, radius_z)
+    (0.0, 0.10, 400, 0.05, 0.05),     # feet
+    (0.10, 0.45, 1200, 0.06, 0.05),   # calves
+    (0.45, 0.50, 200, 0.05, 0.05),    # knees
+    (0.50, 0.82, 1200, 0.08, 0.07),   # thighs
+    (0.82, 0.85, 200, 0.04, 0.04),    # crotch
+    (0.85, 1.05, 800, 0.14, 0.10),    # hips / pelvis
+    (1.05, 1.20, 600, 0.13, 0.09),    # waist
+    (1.20, 1.45, 800, 0.15, 0.11),    # chest
+    (1.45, 1.55, 300, 0.04, 0.04),    # neck
+    (1.55, 1.75, 400, 0.09, 0.09),    # head
+]
+
+# Arms (offset from torso)
+_ARM_SEGMENTS = [
+    # (y_start, y_end, num_verts, radius, x_offset)
+    (1.20, 1.40, 200, 0.04, 0.20),    # upper arm
+    (0.95, 1.20, 200, 0.035, 0.22),   # forearm
+    (0.85, 0.95, 90, 0.025, 0.23),    # wrist/hand
+]
+
+
+def _build_placeholder_segments() -> tuple[np.ndarray, ...]:
+    """Flatten body + left/right arm segments into one parameter table.
+
+    Table columns: y_start, y_end, num_verts, radius_x, radius_z,
+    noise_scale, angle_jitter, is_body. Segment sizes are clipped so the
+    total never exceeds the SMPL vertex count (the arm segments overflow it).
 
     Returns:
-        vertices: (6890, 3) mesh vertices in meters.
-        faces: (13776, 3) mesh face indices.
+        table: (S, 8) segment parameters.
+        x_offsets: (S,) lateral arm offsets (0 for body segments).
+        seg_id: (N,) segment index of each generated vertex.
+        within: (N,) index of each vertex within its segment.
     """
-    if smpl_model_path is not None:
-        try:
-            import smplx
-            model = smplx.create(
-                smpl_model_path,
-                model_type="smpl",
-                gender="neutral",
-                num_betas=10,
-            )
-            import torch
-            betas_tensor = torch.tensor(betas, dtype=torch.float32).unsqueeze(0)
-            output = model(betas=betas_tensor)
-            vertices = output.vertices.detach().cpu().numpy()[0]
-            faces = model.faces.astype(np.int64)
-            return vertices, faces
-        except Exception as e:
-            logger.warning(f"Failed to load SMPL model: {e}. Using placeholder mesh.")
+    rows = [
+        (y0, y1, n, rx, rz, 0.05, 0.1, 1.0)
+        for y0, y1, n, rx, rz in _BODY_SEGMENTS
+    ]
+    x_offsets = [0.0] * len(rows)
+    for y0, y1, n, r, x_off in _ARM_SEGMENTS:
+        for side in (1.0, -1.0):  # left, right
+            rows.append((y0, y1, n, r, r, 0.03, 0.0, 0.0))
+            x_offsets.append(side * x_off)
+
+    table = np.array(rows, dtype=np.float64)
+    starts = np.concatenate([[0], np.cumsum(table[:, 2])[:-1]])
+    table[:, 2] = np.clip(_PLACEHOLDER_N_VERTS - starts, 0, table[:, 2])
+    keep = table[:, 2] > 0
+    table = table[keep]
+
+    sizes = table[:, 2].astype(np.int64)
+    seg_id = np.repeat(np.arange(len(sizes)), sizes)
+    within = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return table, np.array(x_offsets)[keep], seg_id, within
 
-    # ── Placeholder mesh for development ──────────────────────────────
-    # Generate a simplified body-shaped mesh from betas.
-    # Beta[0] controls overall size, beta[1] height/width ratio, etc.
-    return _generate_placeholder_mesh(betas)
+
+(
+    _PLACEHOLDER_SEG,
+    _PLACEHOLDER_X_OFFSET,
+    _PLACEHOLDER_SEG_ID,
+    _PLACEHOLDER_WITHIN,
+) = _build_placeholder_segments()
+
+
+def _build_placeholder_faces() -> np.ndarray:
+    """Strip-style face indices for the placeholder mesh.
+
+    In practice, SMPL faces are fixed topology. This is a placeholder.
+    Depends only on the vertex/face counts, so it is built once at import.
+    """
+    base = np.arange(_PLACEHOLDER_N_FACES, dtype=np.int64) % (_PLACEHOLDER_N_VERTS - 2)
+    faces = np.stack([base, base + 1, base + 2], axis=1) % _PLACEHOLDER_N_VERTS
+    faces.setflags(write=False)
+    return faces
+
+
+_PLACEHOLDER_FACES = _build_placeholder_faces()
 
 
 def _generate_placeholder_mesh(betas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
@@ -145,8 +198,7 @@ def _generate_placeholder_mesh(betas: np.ndarray) -> tuple[np.ndarray, np.ndarra
         vertices: (6890, 3) mesh vertices.
         faces: (13776, 3) mesh faces.
     """
-    n_verts = 6890
-    n_faces = 13776
+    n_verts = _PLACEHOLDER_N_VERTS
 
     # Base body proportions (meters, centered at origin, standing on y=0)
     # Height ~1.75m, parameterized by betas
@@ -155,163 +207,151 @@ def _generate_placeholder_mesh(betas: np.ndarray) -> tuple[np.ndarray, np.ndarra
     depth_scale = 1.0 + 0.02 * betas[2]   # beta[2] ~ depth
 
     # Generate vertices as a noisy cylinder approximation of body shape
-    rng = np.random.RandomState(42)  # Deterministic for same betas
-
-    # Create body segments with appropriate radii
-    segments = [
-        # (y_start, y_end, num_verts, radius_x, radius_z)
-        (0.0, 0.10, 400, 0.05, 0.05),     # feet
-        (0.10, 0.45, 1200, 0.06, 0.05),   # calves
-        (0.45, 0.50, 200, 0.05, 0.05),    # knees
-        (0.50, 0.82, 1200, 0.08, 0.07),   # thighs
-        (0.82, 0.85, 200, 0.04, 0.04),    # crotch
-        (0.85, 1.05, 800, 0.14, 0.10),    # hips / pelvis
-        (1.05, 1.20, 600, 0.13, 0.09),    # waist
-        (1.20, 1.45, 800, 0.15, 0.11),    # chest
-        (1.45, 1.55, 300, 0.04, 0.04),    # neck
-        (1.55, 1.75, 400, 0.09, 0.09),    # head
-    ]
-
-    # Arms (offset from torso)
-    arm_segments = [
-        # (y_start, y_end, num_verts, radius, x_offset)
-        (1.20, 1.40, 200, 0.04, 0.20),    # upper arm
-        (0.95, 1.20, 200, 0.035, 0.22),   # forearm
-        (0.85, 0.95, 90, 0.025, 0.23),    # wrist/hand
-    ]
+    rng = np.random.default_rng(42)  # Deterministic for same betas
+
+    # All random draws up front: radial noise for x/z and a uniform [0, 1)
+    # stream used for angle jitter (and heights of any fill vertices)
+    xz_noise = rng.standard_normal((2, n_verts))
+    uniform = rng.random(n_verts)
+
+    # Per-vertex segment parameters, gathered from the segment table
+    seg = _PLACEHOLDER_SEG_ID
+    n = len(seg)
+    n_seg = _PLACEHOLDER_SEG[seg, 2]
+    within = _PLACEHOLDER_WITHIN
+    is_body = _PLACEHOLDER_SEG[seg, 7] > 0
+    noise = xz_noise[:, :n]
+
+    # np.linspace(y_start, y_end, n) and evenly spaced angles per segment
+    y_start, y_end = _PLACEHOLDER_SEG[seg, 0], _PLACEHOLDER_SEG[seg, 1]
+    y_vals = y_start + (y_end - y_start) * within / np.maximum(n_seg - 1, 1)
+    angles = 2 * np.pi * within / n_seg + _PLACEHOLDER_SEG[seg, 6] * uniform[:n]
+
+    # Torso/leg radii scale with betas; arm radii don't, but arm offsets do
+    rx = _PLACEHOLDER_SEG[seg, 3] * np.where(is_body, width_scale, 1.0)
+    rz = _PLACEHOLDER_SEG[seg, 4] * np.where(is_body, depth_scale, 1.0)
+    noise_scale = _PLACEHOLDER_SEG[seg, 5]
 
     vertices = np.zeros((n_verts, 3), dtype=np.float32)
-    idx = 0
-
-    for y_start, y_end, n, rx, rz in segments:
-        if idx + n > n_verts:
-            n = n_verts - idx
-        y_vals = np.linspace(y_start, y_end, n)
-        angles = np.linspace(0, 2 * np.pi, n, endpoint=False) + rng.uniform(0, 0.1, n)
-        x_vals = rx * width_scale * np.cos(angles) * (1 + 0.05 * rng.randn(n))
-        z_vals = rz * depth_scale * np.sin(angles) * (1 + 0.05 * rng.randn(n))
-        vertices[idx:idx + n, 0] = x_vals
-        vertices[idx:idx + n, 1] = y_vals * height_scale
-        vertices[idx:idx + n, 2] = z_vals
-        idx += n
-
-    # Arms (left and right)
-    for y_start, y_end, n, r, x_off in arm_segments:
-        for side in [1.0, -1.0]:  # left, right
-            if idx + n > n_verts:
-                n = n_verts - idx
-            if n <= 0:
-                break
-            y_vals = np.linspace(y_start, y_end, n)
-            angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
-            x_vals = side * x_off * width_scale + r * np.cos(angles) * (1 + 0.03 * rng.randn(n))
-            z_vals = r * np.sin(angles) * (1 + 0.03 * rng.randn(n))
-            vertices[idx:idx + n, 0] = x_vals
-            vertices[idx:idx + n, 1] = y_vals * height_scale
-            vertices[idx:idx + n, 2] = z_vals
-            idx += n
+    vertices[:n, 0] = (
+        _PLACEHOLDER_X_OFFSET[seg] * width_scale
+        + rx * np.cos(angles) * (1 + noise_scale * noise[0])
+    )
+    vertices[:n, 1] = y_vals * height_scale
+    vertices[:n, 2] = rz * np.sin(angles) * (1 + noise_scale * noise[1])
 
     # Fill remaining vertices if any
-    if idx < n_verts:
-        remaining = n_verts - idx
-        vertices[idx:, 0] = rng.randn(remaining) * 0.02
-        vertices[idx:, 1] = rng.uniform(0, 1.75, remaining) * height_scale
-        vertices[idx:, 2] = rng.randn(remaining) * 0.02
-
-    # Generate faces via Delaunay-like triangulation
-    # In practice, SMPL faces are fixed topology. This is a placeholder.
-    faces = np.zeros((n_faces, 3), dtype=np.int64)
-    for i in range(n_faces):
-        base = i % (n_verts - 2)
-        faces[i] = [base, (base + 1) % n_verts, (base + 2) % n_verts]
-
-    return vertices, faces
-
-
-def _slice_mesh_at_height(
-    vertices: np.ndarray,
-    faces: np.ndarray,
-    y_height: float,
-    tolerance: float = 0.01,
-) -> np.ndarray:
-    """Slice a mesh with a horizontal plane at a given height.
-
-    Finds the intersection contour of the mesh with the plane y = y_height.
+    if n < n_verts:
+        vertices[n:, 0] = xz_noise[0, n:] * 0.02
+        vertices[n:, 1] = uniform[n:] * 1.75 * height_scale
+        vertices[n:, 2] = xz_noise[1, n:] * 0.02
 
-    Args:
-        vertices: (N, 3) mesh vertices.
-        faces: (M, 3) mesh face indices.
-        y_height: Height (y-coordinate) to slice at, in meters.
-        tolerance: Vertex selection tolerance in meters.
+    return vertices, _PLACEHOLDER_FACES
 
-    Returns:
-        contour: (K, 2) array of (x, z) points forming the contour.
-    """
-    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
 
-    try:
-        # Use trimesh section to get exact cross-section
-        plane_origin = [0, y_height, 0]
-        plane_normal = [0, 1, 0]
-        section = mesh.section(plane_origin=plane_origin, plane_normal=plane_normal)
+def _slice_mesh(
+    vertices: np.ndarray, faces: np.ndarray, heights: np.ndarray
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Intersect a mesh with horizontal planes y = h.
 
-        if section is not None:
-            # Get 2D contour points (in the cutting plane)
-            path_2d, _ = section.to_planar()
-            if len(path_2d.vertices) > 2:
-                return path_2d.vertices
-    except Exception:
-        pass
+    Works on the raw (F, 3, 3) triangle array, so no trimesh.Trimesh (and its
+    caches) is built per scan. A vertex counts as above the plane only when
+    y > h, so every crossing triangle has exactly two crossing edges and
+    vertices lying on the plane are handled without special cases.
 
-    # Fallback: select vertices near the slice height
-    mask = np.abs(vertices[:, 1] - y_height) < tolerance
-    nearby = vertices[mask]
+    Args:
+        vertices: (V, 3) vertex positions, y up.
+        faces: (F, 3) vertex indices per triangle.
+        heights: (M,) plane heights.
 
-    if len(nearby) < 3:
-        # Widen tolerance
-        mask = np.abs(vertices[:, 1] - y_height) < tolerance * 3
-        nearby = vertices[mask]
+    Returns:
+        List of M (segments, edge_keys) pairs: (K, 2, 3) (start, end)
+        segment points and the (K, 2) ids of the mesh edges each endpoint
+        lies on. Neighbouring segments share an edge id, which is how
+        _select_loop follows a contour.
+    """
+    triangles = vertices[faces]
+    edge_starts = triangles
+    edge_ends = np.roll(triangles, -1, axis=1)  # edges 0-1, 1-2, 2-0
+    # Undirected edge ids, equal for the two triangles sharing an edge
+    edge_vertices = np.sort(
+        np.stack([faces, np.roll(faces, -1, axis=1)], axis=-1)
+    ).astype(np.int64)
+    edge_ids = edge_vertices[..., 0] * len(vertices) + edge_vertices[..., 1]
+    y_min = triangles[:, :, 1].min(axis=1)
+    y_max = triangles[:, :, 1].max(axis=1)
+    normal = np.array([0.0, 1.0, 0.0])
+
+    sections = []
+    for h in heights:
+        hit = (y_min <= h) & (y_max > h)
+        starts, ends = edge_starts[hit], edge_ends[hit]
+        crossing = (starts[:, :, 1] > h) != (ends[:, :, 1] > h)
+        points, _ = trimesh.intersections.plane_lines(
+            np.array([0.0, h, 0.0]),
+            normal,
+            np.stack([starts[crossing], ends[crossing]]),
+            line_segments=False,
+        )
+        # Exactly two crossing edges per hit triangle, in row order
+        sections.append((
+            points.reshape(-1, 2, 3),
+            edge_ids[hit][crossing].reshape(-1, 2),
+        ))
+    return sections
 
-    if len(nearby) < 3:
-        return np.array([[0, 0]])
 
-    # Return x, z coordinates
-    return nearby[:, [0, 2]]
+def _select_loop(
+    segments: np.ndarray, edge_keys: np.ndarray, landmark: np.ndarray
+) -> np.ndarray:
+    """Keep only the closed contour of a cross-section nearest a landmark.
 
+    A plane at thigh height cuts both legs (and one at bicep height cuts the
+    arm and the torso), so the segments are grouped into connected loops by
+    shared mesh edges and only the loop closest to the landmark (in the
+    horizontal x-z plane) is kept.
 
-def _contour_circumference(contour: np.ndarray) -> float:
-    """Calculate circumference of a 2D contour.
+    Args:
+        segments: (K, 2, 3) segments from _slice_mesh.
+        edge_keys: (K, 2) edge ids of the segment endpoints.
+        landmark: (3,) landmark position identifying the region.
 
-    Sorts points by angle from centroid, then sums segment lengths.
+    Returns:
+        (L, 2, 3) segments of the selected loop.
+    """
+    if len(segments) == 0:
+        return segments
+
+    nodes, endpoint_nodes = np.unique(edge_keys, return_inverse=True)
+    endpoint_nodes = endpoint_nodes.reshape(-1, 2)
+    graph = scipy.sparse.coo_matrix(
+        (
+            np.ones(len(endpoint_nodes)),
+            (endpoint_nodes[:, 0], endpoint_nodes[:, 1]),
+        ),
+        shape=(len(nodes), len(nodes)),
+    )
+    _, labels = scipy.sparse.csgraph.connected_components(graph, directed=False)
+    segment_loops = labels[endpoint_nodes[:, 0]]
+
+    midpoints = segments.mean(axis=1)
+    distances = np.hypot(
+        midpoints[:, 0] - landmark[0], midpoints[:, 2] - landmark[2]
+    )
+    return segments[segment_loops == segment_loops[distances.argmin()]]
+
+
+def _circumference_from_segments(segments: np.ndarray) -> float:
+    """Total length of a planar cross-section given as line segments.
 
     Args:
-        contour: (K, 2) array of points.
+        segments: (K, 2, D) array of (start, end) points from a mesh-plane
+                  intersection.
 
     Returns:
         Circumference in the same units as the input points (meters).
     """
-    if len(contour) < 3:
-        return 0.0
-
-    # Center the contour
-    centroid = contour.mean(axis=0)
-    centered = contour - centroid
-
-    # Sort by angle
-    angles = np.arctan2(centered[:, 1], centered[:, 0])
-    sorted_idx = np.argsort(angles)
-    sorted_pts = contour[sorted_idx]
-
-    # Sum segment lengths (closed polygon)
-    diffs = np.diff(sorted_pts, axis=0, append=sorted_pts[:1])
-    segment_lengths = np.sqrt(np.sum(diffs ** 2, axis=1))
-
-    return float(np.sum(segment_lengths))
-
-
-def _compute_distance(vertices: np.ndarray, idx_a: int, idx_b: int) -> float:
-    """Euclidean distance between two vertices."""
-    return float(np.linalg.norm(vertices[idx_a] - vertices[idx_b]))
+    return float(np.linalg.norm(segments[:, 1] - segments[:, 0], axis=1).sum())
 
 
 # ── Measurement region definitions ────────────────────────────────────────
@@ -377,17 +417,189 @@ CIRCUMFERENCE_REGIONS = {
     },
 }
 
+# Each length is the straight-line distance between two landmarks.
+LENGTH_MEASUREMENTS = {
+    "arm_span": ("left_hand_tip", "right_hand_tip"),
+    "shoulder_width": ("left_shoulder_tip", "right_shoulder_tip"),
+    "torso_length": ("sternum", "crotch"),
+    "inseam": ("crotch", "left_ankle"),
+}
+
 
 class MeasurementExtractor:
     """Extract anthropometric measurements from an SMPL mesh."""
 
-    def __init__(self, smpl_model_path: Optional[str] = None):
+    def __init__(
+        self,
+        smpl_model_path: Optional[str] = None,
+        device: Optional[str] = None,
+        allow_placeholder: bool = False,
+    ):
         """
         Args:
             smpl_model_path: Path to SMPL model .npz file.
-                           If None, uses placeholder mesh generation.
+            device: Torch device for the SMPL forward. Auto-detects GPU if None.
+            allow_placeholder: Fall back to the synthetic placeholder mesh when
+                             the SMPL model is unavailable (development only).
+                             Otherwise a missing or failing model raises.
+
+        Raises:
+            RuntimeError: If the SMPL model can't be loaded and
+                          allow_placeholder is False.
         """
         self.smpl_model_path = smpl_model_path
+        self.allow_placeholder = allow_placeholder
+        if device is None:
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        else:
+            self.device = device
+
+        # Load the SMPL model once; per-scan work is just the forward pass
+        self._smpl_model = None
+        self._smpl_faces: Optional[np.ndarray] = None
+        self._smpl_graph: Optional[torch.cuda.CUDAGraph] = None
+        if smpl_model_path is not None:
+            try:
+                import smplx
+                self._smpl_model = smplx.create(
+                    smpl_model_path,
+                    model_type="smpl",
+                    gender="neutral",
+                    num_betas=10,
+                ).to(self.device).eval()
+                self._smpl_faces = self._smpl_model.faces.astype(np.int64)
+
+                # Persistent betas input, staged through pinned host memory
+                # on CUDA (mirrors BodyCompositionEstimator's input buffers)
+                self._betas_buf = torch.zeros(
+                    (1, 10), dtype=torch.float32, device=self.device
+                )
+                self._betas_buf_cpu = (
+                    torch.zeros((1, 10), dtype=torch.float32, pin_memory=True)
+                    if torch.device(self.device).type == "cuda"
+                    else self._betas_buf
+                )
+            except Exception as e:
+                logger.warning(f"Failed to load SMPL model: {e}")
+                self._smpl_model = None
+
+        if self._smpl_model is None:
+            if not allow_placeholder:
+                raise RuntimeError(
+                    "SMPL model not available and placeholder meshes are disabled"
+                )
+            logger.warning("No SMPL model, using placeholder mesh (development only)")
+
+        if self._smpl_model is not None and torch.device(self.device).type == "cuda":
+            self._capture_smpl_graph()
+
+        # Per-instance memo of the T-pose mesh, keyed by raw float32 betas bytes.
+        # extract() and get_mesh() run on the same betas for every scan.
+        self._mesh_cache = functools.lru_cache(maxsize=32)(self._build_mesh)
+
+        # Region landmark pairs and offsets as arrays for a vectorized gather
+        self._region_names: list[str] = []
+        region_idx: list[tuple[int, int]] = []
+        region_offsets: list[float] = []
+        for region_name, region_def in CIRCUMFERENCE_REGIONS.items():
+            lm_a_name, lm_b_name = region_def["landmarks"]
+            lm_a = LANDMARKS.get(lm_a_name)
+            lm_b = LANDMARKS.get(lm_b_name)
+            if lm_a is None or lm_b is None:
+                logger.warning(f"Landmark not found for region {region_name}")
+                continue
+            self._region_names.append(region_name)
+            region_idx.append((lm_a, lm_b))
+            region_offsets.append(region_def["y_offset"])
+        self._region_idx = np.array(region_idx, dtype=np.int64).reshape(-1, 2)
+        self._region_offsets = np.array(region_offsets, dtype=np.float32)
+
+        # Landmark index pairs for all length measurements, gathered at once
+        self._length_names: list[str] = []
+        length_idx: list[tuple[int, int]] = []
+        for length_name, (lm_a_name, lm_b_name) in LENGTH_MEASUREMENTS.items():
+            lm_a = LANDMARKS.get(lm_a_name)
+            lm_b = LANDMARKS.get(lm_b_name)
+            if lm_a is None or lm_b is None:
+                logger.warning(f"Landmark not found for length {length_name}")
+                continue
+            self._length_names.append(length_name)
+            length_idx.append((lm_a, lm_b))
+        self._length_idx = np.array(length_idx, dtype=np.int64).reshape(-1, 2)
+
+    def _capture_smpl_graph(self) -> None:
+        """Capture the fixed-shape SMPL forward in a CUDA graph.
+
+        betas (1, 10) → vertices (1, 6890, 3) never changes shape, so one
+        graph replay replaces the dozens of small kernel launches of an eager
+        forward. Falls back to eager forwards if capture fails.
+        """
+        try:
+            with torch.no_grad():
+                # Warm up on a side stream so lazy init isn't captured
+                stream = torch.cuda.Stream()
+                stream.wait_stream(torch.cuda.current_stream())
+                with torch.cuda.stream(stream):
+                    for _ in range(3):
+                        self._smpl_model(betas=self._betas_buf)
+                torch.cuda.current_stream().wait_stream(stream)
+
+                graph = torch.cuda.CUDAGraph()
+                # thread_local: request threads may decode JPEGs on the GPU
+                # while the background warm-up captures
+                with torch.cuda.graph(graph, capture_error_mode="thread_local"):
+                    self._graph_vertices = self._smpl_model(betas=self._betas_buf).vertices
+            self._smpl_graph = graph
+        except Exception as e:
+            logger.warning(f"SMPL CUDA graph capture failed, using eager forward: {e}")
+            self._smpl_graph = None
+
+    def _get_mesh(self, betas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Cached T-pose mesh for `betas`. Returned arrays are read-only."""
+        return self._mesh_cache(np.asarray(betas, dtype=np.float32).tobytes())
+
+    def _build_mesh(self, betas_bytes: bytes) -> tuple[np.ndarray, np.ndarray]:
+        betas = np.frombuffer(betas_bytes, dtype=np.float32)
+        vertices, faces = self._get_smpl_mesh(betas)
+        vertices.flags.writeable = False
+        faces.flags.writeable = False
+        return vertices, faces
+
+    def _get_smpl_mesh(self, betas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Generate SMPL mesh in T-pose from shape parameters.
+
+        Uses the loaded SMPL model, or a synthetic placeholder mesh for
+        development when no model is available.
+
+        Args:
+            betas: (10,) SMPL shape parameters.
+
+        Returns:
+            vertices: (6890, 3) mesh vertices in meters.
+            faces: (13776, 3) mesh face indices.
+        """
+        if self._smpl_model is not None:
+            try:
+                self._betas_buf_cpu.numpy()[0] = betas
+                if self._betas_buf_cpu is not self._betas_buf:
+                    self._betas_buf.copy_(self._betas_buf_cpu, non_blocking=True)
+                if self._smpl_graph is not None:
+                    self._smpl_graph.replay()
+                    vertices = self._graph_vertices[0].cpu().numpy()
+                else:
+                    with torch.inference_mode():
+                        output = self._smpl_model(betas=self._betas_buf)
+                    vertices = output.vertices[0].cpu().numpy()
+                return vertices.astype(np.float32, copy=False), self._smpl_faces
+            except Exception as e:
+                if not self.allow_placeholder:
+                    raise RuntimeError(f"SMPL forward failed: {e}") from e
+                logger.warning(f"SMPL forward failed: {e}. Using placeholder mesh.")
+
+        # ── Placeholder mesh for development ──────────────────────────
+        # Generate a simplified body-shaped mesh from betas.
+        # Beta[0] controls overall size, beta[1] height/width ratio, etc.
+        return _generate_placeholder_mesh(betas)
 
     def extract(
         self,
@@ -410,13 +622,15 @@ class MeasurementExtractor:
         logger.info("Extracting measurements from SMPL mesh")
 
         # Generate T-pose mesh
-        vertices, faces = _get_smpl_mesh(betas, self.smpl_model_path)
+        vertices, faces = self._get_mesh(betas)
 
-        # Scale mesh to match real height
+        # Scale mesh to match real height. The cached arrays are read-only,
+        # so this is the one float32 copy made per call.
         mesh_height = vertices[:, 1].max() - vertices[:, 1].min()
         if mesh_height > 0:
             scale = (height_cm / 100.0) / mesh_height  # Convert cm to meters
-            vertices = vertices * scale
+            if scale != 1.0:
+                vertices = np.multiply(vertices, scale, dtype=np.float32)
         else:
             scale = 1.0
 
@@ -426,36 +640,48 @@ class MeasurementExtractor:
         measurements = MeasurementSet()
         measurements.height = height_cm
 
-        for region_name, region_def in CIRCUMFERENCE_REGIONS.items():
-            lm_a_name, lm_b_name = region_def["landmarks"]
-            lm_a = LANDMARKS.get(lm_a_name)
-            lm_b = LANDMARKS.get(lm_b_name)
-
-            if lm_a is None or lm_b is None:
-                logger.warning(f"Landmark not found for region {region_name}")
-                continue
-
-            # Ensure landmark indices are within vertex bounds
-            if lm_a >= len(vertices) or lm_b >= len(vertices):
+        # Ensure landmark indices are within vertex bounds
+        in_bounds = (self._region_idx < len(vertices)).all(axis=1)
+        region_names: list[str] = []
+        for region_name, ok in zip(self._region_names, in_bounds):
+            if ok:
+                region_names.append(region_name)
+            else:
                 logger.warning(f"Landmark index out of bounds for {region_name}")
-                continue
+        region_idx = self._region_idx[in_bounds]
 
-            # Slice height = midpoint of landmarks + offset
-            y_a = vertices[lm_a, 1]
-            y_b = vertices[lm_b, 1]
-            slice_y = (y_a + y_b) / 2.0 + region_def["y_offset"]
+        # Slice height = midpoint of landmarks + offset
+        slice_ys = (
+            0.5 * (vertices[region_idx[:, 0], 1] + vertices[region_idx[:, 1], 1])
+            + self._region_offsets[in_bounds]
+        )
 
-            contour = _slice_mesh_at_height(vertices, faces, slice_y)
-            circumference_m = _contour_circumference(contour)
+        # Slice all regions against the raw triangles of one shared mesh,
+        # then measure only the loop around each region's landmarks
+        sections = _slice_mesh(vertices, faces, slice_ys)
+        landmarks = 0.5 * (vertices[region_idx[:, 0]] + vertices[region_idx[:, 1]])
+
+        for region_name, (segments, edge_keys), landmark in zip(
+            region_names, sections, landmarks
+        ):
+            if len(segments) == 0:
+                logger.warning(f"Slice plane misses the mesh for {region_name}")
+            segments = _select_loop(segments, edge_keys, landmark)
+            circumference_m = _circumference_from_segments(segments)
             circumference_cm = circumference_m * 100.0  # Convert to cm
 
             setattr(measurements, region_name, circumference_cm)
 
         # ── Extract length measurements ───────────────────────────────
-        measurements.arm_span = self._compute_arm_span(vertices)
-        measurements.shoulder_width = self._compute_shoulder_width(vertices)
-        measurements.torso_length = self._compute_torso_length(vertices)
-        measurements.inseam = self._compute_inseam(vertices)
+        # All landmark pairs in one gather; out-of-bounds pairs stay 0
+        lengths = np.zeros(len(self._length_idx))
+        in_bounds = (self._length_idx < len(vertices)).all(axis=1)
+        length_idx = self._length_idx[in_bounds]
+        lengths[in_bounds] = np.linalg.norm(
+            vertices[length_idx[:, 0]] - vertices[length_idx[:, 1]], axis=1
+        ) * 100.0  # Convert to cm
+        for length_name, length_cm in zip(self._length_names, lengths.tolist()):
+            setattr(measurements, length_name, length_cm)
 
         logger.info(
             f"Measurement extraction complete: "
@@ -477,49 +703,10 @@ class MeasurementExtractor:
             vertices: (6890, 3) scaled mesh vertices.
             faces: (13776, 3) mesh faces.
         """
-        vertices, faces = _get_smpl_mesh(betas, self.smpl_model_path)
+        vertices, faces = self._get_mesh(betas)
         mesh_height = vertices[:, 1].max() - vertices[:, 1].min()
         if mesh_height > 0:
             scale = (height_cm / 100.0) / mesh_height
-            vertices = vertices * scale
+            if scale != 1.0:
+                vertices = np.multiply(vertices, scale, dtype=np.float32)
         return vertices, faces
-
-    def _compute_arm_span(self, vertices: np.ndarray) -> float:
-        """Arm span: left hand tip to right hand tip, in cm."""
-        lm_left = LANDMARKS.get("left_hand_tip")
-        lm_right = LANDMARKS.get("right_hand_tip")
-        if lm_left is None or lm_right is None:
-            return 0.0
-        if lm_left >= len(vertices) or lm_right >= len(vertices):
-            return 0.0
-        return _compute_distance(vertices, lm_left, lm_right) * 100.0
-
-    def _compute_shoulder_width(self, vertices: np.ndarray) -> float:
-        """Shoulder width: left shoulder tip to right shoulder tip, in cm."""
-        lm_left = LANDMARKS.get("left_shoulder_tip")
-        lm_right = LANDMARKS.get("right_shoulder_tip")
-        if lm_left is None or lm_right is None:
-            return 0.0
-        if lm_left >= len(vertices) or lm_right >= len(vertices):
-            return 0.0
-        return _compute_distance(vertices, lm_left, lm_right) * 100.0
-
-    def _compute_torso_length(self, vertices: np.ndarray) -> float:
-        """Torso length: sternum to crotch, in cm."""
-        lm_top = LANDMARKS.get("sternum")
-        lm_bottom = LANDMARKS.get("crotch")
-        if lm_top is None or lm_bottom is None:
-            return 0.0
-        if lm_top >= len(vertices) or lm_bottom >= len(vertices):
-            return 0.0
-        return _compute_distance(vertices, lm_top, lm_bottom) * 100.0
-
-    def _compute_inseam(self, vertices: np.ndarray) -> float:
-        """Inseam: crotch to left ankle, in cm."""
-        lm_top = LANDMARKS.get("crotch")
-        lm_bottom = LANDMARKS.get("left_ankle")
-        if lm_top is None or lm_bottom is None:
-            return 0.0
-        if lm_top >= len(vertices) or lm_bottom >= len(vertices):
-            return 0.0
-        return _compute_distance(vertices, lm_top, lm_bottom) * 100.0
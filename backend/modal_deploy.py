@@ -33,6 +33,7 @@ gpu_image = (
         "uvicorn[standard]==0.34.0",
         "python-multipart==0.0.18",
         "pydantic==2.10.4",
+        "orjson>=3.9.0",
         "torch>=2.1.0",
         "torchvision>=0.16.0",
         "smplx==0.1.28",
@@ -4,10 +4,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import Annotated, Optional
 
 import numpy as np
-from pydantic import BaseModel, Field
+from pydantic import (
+    BaseModel,
+    Field,
+    PlainSerializer,
+    PlainValidator,
+    WithJsonSchema,
+)
 
 
 # ── Enums ──────────────────────────────────────────────────────────────────
@@ -126,6 +132,37 @@ class BodyCompositionResult:
         }
 
 
+def _mesh_array(dtype: type, item_type: str):
+    """(N, 3) numpy mesh field: accepts arrays or nested lists, serializes
+    to nested JSON lists, and documents itself as such in OpenAPI."""
+
+    def validate(value) -> np.ndarray:
+        array = np.asarray(value, dtype=dtype)
+        if array.ndim != 2 or array.shape[1] != 3:
+            raise ValueError(f"expected an (N, 3) array, got shape {array.shape}")
+        return array
+
+    return Annotated[
+        np.ndarray,
+        PlainValidator(validate),
+        PlainSerializer(lambda array: array.tolist(), when_used="json"),
+        WithJsonSchema({
+            "type": "array",
+            "items": {
+                "type": "array",
+                "items": {"type": item_type},
+                "minItems": 3,
+                "maxItems": 3,
+            },
+        }),
+    ]
+
+
+# (N, 3) mesh arrays kept as numpy so responses skip tolist()
+MeshVertices = _mesh_array(np.float32, "number")
+MeshFaces = _mesh_array(np.int64, "integer")
+
+
 # ── API request / response models ─────────────────────────────────────────
 
 class ScanMetadata(BaseModel):
@@ -143,8 +180,8 @@ class ScanResponse(BaseModel):
     """Full scan result returned by the API."""
     measurements: dict[str, float]
     body_composition: dict[str, float | str]
-    mesh_vertices: list[list[float]]   # (6890, 3) flattened
-    mesh_faces: list[list[int]]        # (13776, 3) flattened
+    mesh_vertices: MeshVertices   # (6890, 3)
+    mesh_faces: MeshFaces         # (13776, 3)
     confidence: float = Field(..., ge=0, le=1)
     scan_tier: ScanTier
 
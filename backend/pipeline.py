@@ -10,11 +10,14 @@ Orchestrates the full flow:
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 import time
 from typing import Optional
 
 import numpy as np
+import torch
 from PIL import Image
 
 from body_composition import BodyCompositionEstimator, formula_body_composition
@@ -24,6 +27,7 @@ from measurement_extractor import MeasurementExtractor
 from models import (
     BodyCompositionResult,
     DepthData,
+    HMRPrediction,
     MeasurementSet,
     ScanResponse,
     ScanTier,
@@ -42,6 +46,9 @@ class ScanPipeline:
         smpl_model_path: Optional[str] = None,
         composition_weights_path: Optional[str] = None,
         device: Optional[str] = None,
+        hmr_onnx_runtime: bool = False,
+        allow_placeholder_mesh: bool = False,
+        hmr_batched: bool = True,
     ):
         """Initialize all pipeline components.
 
@@ -50,40 +57,118 @@ class ScanPipeline:
             smpl_model_path: Path to SMPL model .npz file.
             composition_weights_path: Path to body composition MLP weights.
             device: Torch device (auto-detects GPU if None).
+            hmr_onnx_runtime: Run HMR through ONNX Runtime on CPU.
+            allow_placeholder_mesh: Use the synthetic placeholder mesh when no
+                                    SMPL model is available (development only).
+            hmr_batched: Run front + side HMR as one batched forward; disable
+                         for models that can't batch (per-image CUDA streams).
         """
         logger.info("Initializing scan pipeline...")
         t0 = time.time()
 
+        # Inputs to the HMR convs are always 256x256, so let cuDNN autotune
+        # once per shape and reuse the fastest algorithm
+        if torch.cuda.is_available():
+            torch.backends.cudnn.benchmark = True
+
         self.hmr = HMRInference(
             pretrained_path=hmr_weights_path,
             device=device,
+            onnx_runtime=hmr_onnx_runtime,
+            batched=hmr_batched,
         )
         self.optimizer = MultiViewOptimizer(device=device)
-        self.extractor = MeasurementExtractor(smpl_model_path=smpl_model_path)
-        self.composition = BodyCompositionEstimator(
-            weights_path=composition_weights_path,
-            device=device,
-        )
+
+        # Extractor + composition load lazily (see warm_up) so the server
+        # comes online once HMR is ready
+        self._device = device
+        self._smpl_model_path = smpl_model_path
+        self._composition_weights_path = composition_weights_path
+        self._allow_placeholder_mesh = allow_placeholder_mesh
+        self._extractor: Optional[MeasurementExtractor] = None
+        self._composition: Optional[BodyCompositionEstimator] = None
+        self._load_lock = threading.Lock()
+        self.load_error: Optional[Exception] = None
+
+        # Warm up the scan-shaped (front + side) HMR batch so cuDNN autotuning
+        # and caching-allocator growth happen at startup, not on the first scan
+        if torch.device(self.hmr.device).type == "cuda":
+            dummy = torch.full(
+                (3, 1440, 1080), 255, dtype=torch.uint8, device=self.hmr.device
+            )
+            self.hmr.predict_batch([dummy, dummy])
 
         logger.info(f"Pipeline initialized in {time.time() - t0:.2f}s")
 
+    @property
+    def extractor(self) -> MeasurementExtractor:
+        """SMPL measurement extractor, loaded on first use."""
+        self.warm_up()
+        return self._extractor
+
+    @property
+    def composition(self) -> BodyCompositionEstimator:
+        """Body composition estimator, loaded on first use."""
+        self.warm_up()
+        return self._composition
+
+    @property
+    def ready(self) -> bool:
+        """Whether the lazily-loaded components are available."""
+        return self._extractor is not None and self._composition is not None
+
+    def warm_up(self) -> None:
+        """Load the extractor + composition models if not loaded yet.
+
+        Thread-safe: concurrent callers wait for a single load. Scans call
+        this before their HMR forward, so a scan arriving during the
+        background warm-up waits for it rather than running GPU work
+        alongside the SMPL graph capture.
+
+        Raises:
+            The load error (also kept in load_error, for health checks).
+        """
+        if self.ready:
+            return
+        with self._load_lock:
+            if self.ready:
+                return
+            t0 = time.time()
+            try:
+                if self._extractor is None:
+                    self._extractor = MeasurementExtractor(
+                        smpl_model_path=self._smpl_model_path,
+                        device=self._device,
+                        allow_placeholder=self._allow_placeholder_mesh,
+                    )
+                if self._composition is None:
+                    self._composition = BodyCompositionEstimator(
+                        weights_path=self._composition_weights_path,
+                        device=self._device,
+                    )
+            except Exception as e:
+                self.load_error = e
+                raise
+            self.load_error = None
+            logger.info(f"Extractor + composition loaded in {time.time() - t0:.2f}s")
+
     def process(
         self,
-        front_image: Image.Image,
-        side_image: Image.Image,
+        front_image: Image.Image | torch.Tensor,
+        side_image: Image.Image | torch.Tensor,
         height_cm: float,
         weight_kg: float,
         age: int,
         sex: str,
-        depth_front_bytes: Optional[bytes] = None,
-        depth_side_bytes: Optional[bytes] = None,
+        depth_front_bytes: Optional[bytes | memoryview] = None,
+        depth_side_bytes: Optional[bytes | memoryview] = None,
         camera_intrinsics: Optional[dict] = None,
     ) -> ScanResponse:
         """Run the full scan pipeline.
 
         Args:
-            front_image: Front-facing PIL RGB image.
-            side_image: Side-profile PIL RGB image.
+            front_image: Front-facing PIL RGB image or decoded uint8 tensor.
+            side_image: Side-profile PIL RGB image or decoded uint8 tensor.
             height_cm: Subject height in cm.
             weight_kg: Subject weight in kg.
             age: Subject age in years.
@@ -95,21 +180,107 @@ class ScanPipeline:
         Returns:
             ScanResponse with all measurements, body composition, and mesh.
         """
-        t0 = time.time()
-        has_depth = depth_front_bytes is not None or depth_side_bytes is not None
+        result = self.process_batch([{
+            "front_image": front_image,
+            "side_image": side_image,
+            "height_cm": height_cm,
+            "weight_kg": weight_kg,
+            "age": age,
+            "sex": sex,
+            "depth_front_bytes": depth_front_bytes,
+            "depth_side_bytes": depth_side_bytes,
+            "camera_intrinsics": camera_intrinsics,
+        }])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def process_batch(
+        self, scans: list[dict]
+    ) -> list[ScanResponse | Exception]:
+        """Run several scans with one batched HMR forward.
+
+        HMR runs once over all 2N front + side images; depth, optimization,
+        extraction and composition then run per scan.
 
-        logger.info(
-            f"Processing scan: {sex}, {age}yo, {height_cm}cm, {weight_kg}kg, "
-            f"depth={'yes' if has_depth else 'no'}"
-        )
+        Args:
+            scans: Up to 16 dicts of process() keyword arguments.
+
+        Returns:
+            One ScanResponse per scan, or the exception that scan raised
+            (an HMR failure is raised for the whole batch).
+        """
+        t0 = time.time()
+        # Waits for (or runs) the extractor + composition load first
+        self.warm_up()
+
+        for scan in scans:
+            has_depth = (
+                scan.get("depth_front_bytes") is not None
+                or scan.get("depth_side_bytes") is not None
+            )
+            logger.info(
+                f"Processing scan: {scan['sex']}, {scan['age']}yo, "
+                f"{scan['height_cm']}cm, {scan['weight_kg']}kg, "
+                f"depth={'yes' if has_depth else 'no'}"
+            )
 
         # ── Step 1: HMR inference ──────────────────────────────────────
+        # Queued on the HMR stream; results are collected after the depth
+        # step so CPU depth processing overlaps the GPU forward
         t1 = time.time()
-        front_pred = self.hmr.predict(front_image)
-        side_pred = self.hmr.predict(side_image)
-        logger.info(f"HMR inference: {time.time() - t1:.3f}s")
+        hmr_outputs = self.hmr.submit_batch([
+            image
+            for scan in scans
+            for image in (scan["front_image"], scan["side_image"])
+        ])
 
         # ── Step 2: Process depth data (if available) ──────────────────
+        depths = [
+            self._process_depth(
+                scan.get("depth_front_bytes"),
+                scan.get("depth_side_bytes"),
+                scan.get("camera_intrinsics"),
+                scan["height_cm"],
+            )
+            for scan in scans
+        ]
+
+        preds = self.hmr.collect(hmr_outputs)
+        logger.info(
+            f"HMR inference + depth ({len(scans)} scans): {time.time() - t1:.3f}s"
+        )
+
+        results: list[ScanResponse | Exception] = []
+        for i, scan in enumerate(scans):
+            try:
+                results.append(self._finish_scan(
+                    preds[2 * i],
+                    preds[2 * i + 1],
+                    *depths[i],
+                    height_cm=scan["height_cm"],
+                    weight_kg=scan["weight_kg"],
+                    age=scan["age"],
+                    sex=scan["sex"],
+                    has_depth=(
+                        scan.get("depth_front_bytes") is not None
+                        or scan.get("depth_side_bytes") is not None
+                    ),
+                ))
+            except Exception as e:
+                results.append(e)
+
+        logger.info(f"Batch of {len(scans)} scans complete in {time.time() - t0:.2f}s")
+        return results
+
+    def _process_depth(
+        self,
+        depth_front_bytes: Optional[bytes | memoryview],
+        depth_side_bytes: Optional[bytes | memoryview],
+        camera_intrinsics: Optional[dict],
+        height_cm: float,
+    ) -> tuple[Optional[DepthData], Optional[DepthData]]:
+        """Decode the optional LiDAR frames, skipping any that fail."""
         depth_front: Optional[DepthData] = None
         depth_side: Optional[DepthData] = None
         intrinsics = camera_intrinsics or {}
@@ -130,6 +301,21 @@ class ScanPipeline:
             except Exception as e:
                 logger.warning(f"Side depth processing failed: {e}")
 
+        return depth_front, depth_side
+
+    def _finish_scan(
+        self,
+        front_pred: HMRPrediction,
+        side_pred: HMRPrediction,
+        depth_front: Optional[DepthData],
+        depth_side: Optional[DepthData],
+        height_cm: float,
+        weight_kg: float,
+        age: int,
+        sex: str,
+        has_depth: bool,
+    ) -> ScanResponse:
+        """Steps 3-7 of the pipeline for one scan's HMR predictions."""
         # ── Step 3: Multi-view optimization ────────────────────────────
         t2 = time.time()
         opt_result = self.optimizer.optimize(
@@ -137,18 +323,21 @@ class ScanPipeline:
         )
         logger.info(f"Optimization: {time.time() - t2:.3f}s, loss={opt_result.loss:.6f}")
 
-        # ── Step 4: Measurement extraction ─────────────────────────────
-        t3 = time.time()
-        measurements = self.extractor.extract(opt_result.betas, height_cm)
-        vertices, faces = self.extractor.get_mesh(opt_result.betas, height_cm)
-        logger.info(f"Measurement extraction: {time.time() - t3:.3f}s")
-
-        # ── Step 5: Body composition ───────────────────────────────────
-        t4 = time.time()
-        composition = self.composition.estimate(
-            opt_result.betas, height_cm, weight_kg, age, sex, measurements
-        )
-        logger.info(f"Body composition: {time.time() - t4:.3f}s")
+        # Only the optimizer needs autograd; everything after it runs without
+        # version counter / autograd bookkeeping
+        with torch.inference_mode():
+            # ── Step 4: Measurement extraction ─────────────────────────
+            t3 = time.time()
+            measurements = self.extractor.extract(opt_result.betas, height_cm)
+            vertices, faces = self.extractor.get_mesh(opt_result.betas, height_cm)
+            logger.info(f"Measurement extraction: {time.time() - t3:.3f}s")
+
+            # ── Step 5: Body composition ───────────────────────────────
+            t4 = time.time()
+            composition = self.composition.estimate(
+                opt_result.betas, height_cm, weight_kg, age, sex, measurements
+            )
+            logger.info(f"Body composition: {time.time() - t4:.3f}s")
 
         # ── Step 6: Compute confidence ─────────────────────────────────
         confidence = self._compute_confidence(
@@ -161,40 +350,22 @@ class ScanPipeline:
         # ── Step 7: Build response ─────────────────────────────────────
         scan_tier = ScanTier.lidar if has_depth else ScanTier.photo
 
-        # Convert measurements to circumference results format
         measurements_dict = measurements.to_dict()
 
-        # Build circumferences list for frontend compatibility
-        circumferences = []
-        circumference_regions = [
-            "neck", "chest", "waist", "hips", "shoulders",
-            "left_bicep", "right_bicep", "left_forearm", "right_forearm",
-            "left_thigh", "right_thigh", "left_calf", "right_calf", "wrist",
-        ]
-        for region in circumference_regions:
-            key = f"{region}_cm"
-            value = measurements_dict.get(key, 0.0)
-            if value > 0:
-                circumferences.append({
-                    "region": region,
-                    "circumference_cm": value,
-                    "frontal_width_cm": 0.0,
-                    "sagittal_depth_cm": 0.0,
-                    "confidence": confidence,
-                })
-
+        # The mesh stays as numpy arrays (no tolist()); the API serializes
+        # them directly with orjson
         response = ScanResponse(
             measurements=measurements_dict,
             body_composition=composition.to_dict(),
-            mesh_vertices=vertices.tolist(),
-            mesh_faces=faces.tolist(),
+            mesh_vertices=vertices,
+            mesh_faces=faces,
             confidence=confidence,
             scan_tier=scan_tier,
         )
 
-        total_time = time.time() - t0
+        total_time = time.time() - t2
         logger.info(
-            f"Scan complete in {total_time:.2f}s — "
+            f"Scan finished in {total_time:.2f}s after HMR — "
             f"tier={scan_tier.value}, confidence={confidence:.2f}"
         )
 
@@ -222,3 +393,75 @@ class ScanPipeline:
 
         confidence = 0.5 * hmr_conf + 0.4 * opt_conf + depth_bonus
         return max(0.0, min(1.0, round(confidence, 2)))
+
+
+class BatchedScanPipeline:
+    """Groups concurrent scan requests into batched pipeline runs.
+
+    Requests queue up for at most max_wait seconds (or until max_batch are
+    pending) and then go through ScanPipeline.process_batch together, so
+    the GPU runs one HMR forward for the whole group.
+    """
+
+    def __init__(
+        self,
+        pipeline: ScanPipeline,
+        max_batch: int = 8,
+        max_wait: float = 0.02,
+    ):
+        """
+        Args:
+            pipeline: Pipeline that runs the batches.
+            max_batch: Maximum scans per batch (at most 16, two HMR images each).
+            max_wait: Seconds to wait for more requests after the first.
+        """
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue[tuple[dict, asyncio.Future]] = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def process(self, **scan) -> ScanResponse:
+        """Queue one scan (process() keyword arguments) and await its result."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((scan, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stop the batching worker."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self) -> None:
+        """Collect batches from the queue and run them off the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await asyncio.to_thread(
+                    self.pipeline.process_batch, [scan for scan, _ in batch]
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():  # Request was cancelled while queued
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
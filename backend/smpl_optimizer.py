@@ -5,17 +5,18 @@ Given HMR predictions from front + side views, optimizes for:
 - Independent theta (pose) parameters — different poses per view
 - Optional depth loss when LiDAR data is available
 
-Uses PyTorch autograd for gradient-based optimization.
+The data and prior terms are quadratic, so the depth-free problem is solved
+in closed form; with depth, PyTorch LBFGS refines the shared betas.
 """
 
 from __future__ import annotations
 
 import logging
+import math
 from typing import Optional
 
 import numpy as np
 import torch
-import torch.nn.functional as F
 
 from models import DepthData, HMRPrediction, OptimizationResult
 
@@ -23,8 +24,7 @@ logger = logging.getLogger(__name__)
 
 # ── Constants ──────────────────────────────────────────────────────────────
 
-MAX_ITERATIONS = 200
-LEARNING_RATE = 0.01
+LBFGS_MAX_ITERATIONS = 20  # Depth refinement only; the rest is closed form
 CONVERGENCE_THRESHOLD = 1e-6
 
 # Loss weights
@@ -34,36 +34,48 @@ W_BETA_CONSISTENCY = 10.0  # Both views must agree on shape
 W_DEPTH = 5.0             # Depth alignment loss (when LiDAR available)
 W_CAMERA = 0.1            # Camera parameter regularization
 
-
-def _axis_angle_to_rotation_matrix(axis_angle: torch.Tensor) -> torch.Tensor:
-    """Convert axis-angle representation to rotation matrix using Rodrigues formula.
-
-    Args:
-        axis_angle: (N, 3) axis-angle vectors.
-
-    Returns:
-        (N, 3, 3) rotation matrices.
+# Layout of the packed host→device buffer: betas, theta_front, theta_side,
+# then the HMR targets (betas front/side, thetas front/side)
+_PACKED_SIZES = (10, 72, 72, 10, 10, 72, 72)
+_N_VARIABLES = sum(_PACKED_SIZES[:3])
+
+# Residual scales for _quadratic_loss: sqrt of each term's weight, with the
+# 0.5 view average and MSE 1/n folded in
+_S_BETA_DATA = math.sqrt(W_BETA_CONSISTENCY * 0.5 / 10)
+_S_THETA_DATA = math.sqrt(0.5 / 72)
+_S_BETA_PRIOR = math.sqrt(W_BETA_PRIOR)
+_S_THETA_PRIOR = math.sqrt(W_THETA_PRIOR * 0.5)
+
+
+def _quadratic_loss(
+    betas: torch.Tensor,
+    theta_front: torch.Tensor,
+    theta_side: torch.Tensor,
+    target_betas_front: torch.Tensor,
+    target_betas_side: torch.Tensor,
+    target_theta_front: torch.Tensor,
+    target_theta_side: torch.Tensor,
+) -> torch.Tensor:
+    """Data + prior terms of the objective as one sum of squares.
+
+    Each term's weight (and its MSE 1/n) is folded into a per-segment
+    residual scale, so the whole objective is a single reduction. Equivalent
+    to the weighted sum of the four per-view MSE losses and the beta / theta
+    L2 priors.
     """
-    angle = torch.norm(axis_angle, dim=-1, keepdim=True).clamp(min=1e-8)
-    axis = axis_angle / angle
-
-    cos_a = torch.cos(angle).unsqueeze(-1)
-    sin_a = torch.sin(angle).unsqueeze(-1)
-
-    # Skew-symmetric matrix
-    x, y, z = axis[..., 0:1], axis[..., 1:2], axis[..., 2:3]
-    zeros = torch.zeros_like(x)
-
-    K = torch.cat([
-        torch.cat([zeros, -z, y], dim=-1).unsqueeze(-2),
-        torch.cat([z, zeros, -x], dim=-1).unsqueeze(-2),
-        torch.cat([-y, x, zeros], dim=-1).unsqueeze(-2),
-    ], dim=-2)
-
-    eye = torch.eye(3, device=axis_angle.device).unsqueeze(0).expand(axis_angle.shape[0], -1, -1)
-    R = eye + sin_a * K + (1 - cos_a) * torch.bmm(K, K)
-
-    return R
+    residual = torch.cat([
+        # Data term: betas should match both HMR predictions
+        _S_BETA_DATA * (betas - target_betas_front),
+        _S_BETA_DATA * (betas - target_betas_side),
+        # Pose data term: thetas should stay near HMR predictions
+        _S_THETA_DATA * (theta_front - target_theta_front),
+        _S_THETA_DATA * (theta_side - target_theta_side),
+        # Priors: prefer average body shape and T-pose (zeros)
+        _S_BETA_PRIOR * betas,
+        _S_THETA_PRIOR * theta_front,
+        _S_THETA_PRIOR * theta_side,
+    ])
+    return residual.pow(2).sum()
 
 
 class MultiViewOptimizer:
@@ -75,6 +87,47 @@ class MultiViewOptimizer:
         else:
             self.device = device
 
+        # All optimizer inputs go through one reusable (pinned on CUDA) host
+        # buffer, so each optimize() does a single host→device copy
+        self._host_buf = torch.empty(
+            sum(_PACKED_SIZES),
+            dtype=torch.float32,
+            pin_memory=torch.device(self.device).type == "cuda",
+        )
+        self._host_parts = np.split(
+            self._host_buf.numpy(), np.cumsum(_PACKED_SIZES)[:-1]
+        )
+
+        # On CUDA, Inductor fuses the loss and its backward into a few
+        # kernels; on CPU the eager version is cheaper than compiling
+        self._loss_fn = (
+            self._compile_loss()
+            if torch.device(self.device).type == "cuda"
+            else _quadratic_loss
+        )
+
+    def _compile_loss(self):
+        """torch.compile the quadratic loss, falling back to eager.
+
+        Warms up with the same arguments optimize() passes (views of one
+        packed buffer, only betas requiring grad): one forward + backward as
+        in LBFGS, and one no_grad forward as in the final loss. Both graphs
+        compile at startup rather than on the first LiDAR scan.
+        """
+        try:
+            compiled = torch.compile(_quadratic_loss, fullgraph=True)
+            args = torch.zeros(sum(_PACKED_SIZES), device=self.device).split(
+                _PACKED_SIZES
+            )
+            args[0].requires_grad_(True)
+            compiled(*args).backward()
+            with torch.no_grad():
+                compiled(*args)
+            return compiled
+        except Exception as e:
+            logger.warning(f"Optimizer loss compilation failed, using eager: {e}")
+            return _quadratic_loss
+
     def optimize(
         self,
         front_pred: HMRPrediction,
@@ -99,99 +152,90 @@ class MultiViewOptimizer:
         """
         logger.info("Starting multi-view SMPL optimization")
 
-        # Initialize from HMR predictions (average betas as starting point)
-        init_betas = (front_pred.betas + side_pred.betas) / 2.0
-
-        # Optimization variables
-        betas = torch.tensor(
-            init_betas, dtype=torch.float32, device=self.device, requires_grad=True
-        )
-        theta_front = torch.tensor(
-            front_pred.thetas, dtype=torch.float32, device=self.device, requires_grad=True
-        )
-        theta_side = torch.tensor(
-            side_pred.thetas, dtype=torch.float32, device=self.device, requires_grad=True
-        )
+        # ── Closed-form solution of the quadratic terms ───────────────
+        # Setting dL/dbeta = 0 and dL/dtheta = 0 in _quadratic_loss (MSE
+        # terms average over n elements, priors sum):
+        #   beta  = Wc * mean(targets) / (Wc + n_beta * Wbp)
+        #   theta = target / (1 + n_theta * Wtp)
+        n_betas = front_pred.betas.shape[-1]
+        n_thetas = front_pred.thetas.shape[-1]
+        (
+            init_betas, init_theta_front, init_theta_side,
+            host_betas_front, host_betas_side, host_theta_front, host_theta_side,
+        ) = self._host_parts
 
         # Original HMR predictions as targets
-        target_betas_front = torch.tensor(
-            front_pred.betas, dtype=torch.float32, device=self.device
-        )
-        target_betas_side = torch.tensor(
-            side_pred.betas, dtype=torch.float32, device=self.device
-        )
-        target_theta_front = torch.tensor(
-            front_pred.thetas, dtype=torch.float32, device=self.device
+        host_betas_front[:] = front_pred.betas
+        host_betas_side[:] = side_pred.betas
+        host_theta_front[:] = front_pred.thetas
+        host_theta_side[:] = side_pred.thetas
+
+        # Written in place: no temporaries for the beta mean
+        np.add(front_pred.betas, side_pred.betas, out=init_betas)
+        init_betas *= (
+            0.5 * W_BETA_CONSISTENCY / (W_BETA_CONSISTENCY + n_betas * W_BETA_PRIOR)
         )
-        target_theta_side = torch.tensor(
-            side_pred.thetas, dtype=torch.float32, device=self.device
-        )
-
-        optimizer = torch.optim.Adam(
-            [betas, theta_front, theta_side],
-            lr=LEARNING_RATE,
-        )
-        scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=80, gamma=0.5)
+        theta_shrink = 1.0 / (1.0 + n_thetas * W_THETA_PRIOR)
+        np.multiply(front_pred.thetas, theta_shrink, out=init_theta_front)
+        np.multiply(side_pred.thetas, theta_shrink, out=init_theta_side)
 
         has_depth = depth_front is not None or depth_side is not None
-        prev_loss = float("inf")
-
-        for iteration in range(MAX_ITERATIONS):
-            optimizer.zero_grad()
-
-            # ── Data term: betas should match both HMR predictions ─────
-            loss_data_front = F.mse_loss(betas, target_betas_front)
-            loss_data_side = F.mse_loss(betas, target_betas_side)
-            loss_data = (loss_data_front + loss_data_side) / 2.0
-
-            # ── Pose data term: thetas should stay near HMR predictions ─
-            loss_pose_front = F.mse_loss(theta_front, target_theta_front)
-            loss_pose_side = F.mse_loss(theta_side, target_theta_side)
-            loss_pose = (loss_pose_front + loss_pose_side) / 2.0
-
-            # ── Beta prior: prefer average body shape ──────────────────
-            loss_beta_prior = torch.sum(betas ** 2)
-
-            # ── Theta prior: prefer T-pose (zeros) ────────────────────
-            loss_theta_prior = (
-                torch.sum(theta_front ** 2) + torch.sum(theta_side ** 2)
-            ) / 2.0
-
-            # ── Depth loss (when LiDAR available) ─────────────────────
-            loss_depth = torch.tensor(0.0, device=self.device)
+        device = self.device if has_depth else "cpu"
+
+        # One copy for everything (copy=True so results never alias the
+        # reused host buffer), then views for each variable / target
+        packed = self._host_buf.to(device, non_blocking=True, copy=True)
+        (
+            betas, theta_front, theta_side,
+            target_betas_front, target_betas_side,
+            target_theta_front, target_theta_side,
+        ) = packed.split(_PACKED_SIZES)
+        betas.requires_grad_(has_depth)
+
+        def objective() -> torch.Tensor:
+            loss_fn = self._loss_fn if has_depth else _quadratic_loss
+            total_loss = loss_fn(
+                betas,
+                theta_front,
+                theta_side,
+                target_betas_front,
+                target_betas_side,
+                target_theta_front,
+                target_theta_side,
+            )
             if has_depth:
-                loss_depth = self._compute_depth_loss(
+                total_loss = total_loss + W_DEPTH * self._compute_depth_loss(
                     betas, theta_front, theta_side, depth_front, depth_side
                 )
-
-            # ── Total loss ────────────────────────────────────────────
-            total_loss = (
-                W_BETA_CONSISTENCY * loss_data
-                + loss_pose
-                + W_BETA_PRIOR * loss_beta_prior
-                + W_THETA_PRIOR * loss_theta_prior
-                + W_DEPTH * loss_depth
+            return total_loss
+
+        # ── Depth refinement (non-quadratic in betas[:3]) ─────────────
+        if has_depth:
+            optimizer = torch.optim.LBFGS(
+                [betas],
+                max_iter=LBFGS_MAX_ITERATIONS,
+                tolerance_change=CONVERGENCE_THRESHOLD,
+                line_search_fn="strong_wolfe",
             )
 
-            total_loss.backward()
-            optimizer.step()
-            scheduler.step()
-
-            current_loss = total_loss.item()
-
-            # Convergence check
-            if abs(prev_loss - current_loss) < CONVERGENCE_THRESHOLD:
-                logger.info(f"Converged at iteration {iteration}, loss={current_loss:.6f}")
-                break
-            prev_loss = current_loss
-
-            if iteration % 50 == 0:
-                logger.debug(
-                    f"Iter {iteration}: total={current_loss:.4f} "
-                    f"data={loss_data.item():.4f} "
-                    f"beta_prior={loss_beta_prior.item():.4f} "
-                    f"depth={loss_depth.item():.4f}"
-                )
+            def closure() -> torch.Tensor:
+                optimizer.zero_grad()
+                total_loss = objective()
+                total_loss.backward()
+                return total_loss
+
+            optimizer.step(closure)
+
+        # Convergence is checked inside LBFGS (tolerance_change); the results
+        # come back in a single device→host copy with the final loss appended
+        with torch.no_grad():
+            host = torch.cat(
+                [packed[:_N_VARIABLES], objective().reshape(1)]
+            ).cpu().numpy()
+        host_betas, host_theta_front, host_theta_side = np.split(
+            host[:_N_VARIABLES], np.cumsum(_PACKED_SIZES[:2])
+        )
+        final_loss = float(host[-1])
 
         # Compute scale from depth if available
         scale = 1.0
@@ -201,15 +245,15 @@ class MultiViewOptimizer:
             scale = depth_side.scale_factor
 
         result = OptimizationResult(
-            betas=betas.detach().cpu().numpy(),
-            theta_front=theta_front.detach().cpu().numpy(),
-            theta_side=theta_side.detach().cpu().numpy(),
+            betas=host_betas,
+            theta_front=host_theta_front,
+            theta_side=host_theta_side,
             scale=scale,
-            loss=prev_loss,
+            loss=final_loss,
         )
 
         logger.info(
-            f"Optimization complete: loss={prev_loss:.6f}, "
+            f"Optimization complete: loss={final_loss:.6f}, "
             f"scale={scale:.4f}, has_depth={has_depth}"
         )
         return result
@@ -235,27 +279,16 @@ class MultiViewOptimizer:
         For now, uses a simplified proxy based on beta/theta magnitude
         scaled by the depth data reliability.
         """
-        loss = torch.tensor(0.0, device=self.device)
-
-        if depth_front is not None:
-            # Proxy: penalize betas that would produce a body size
-            # inconsistent with the depth-observed scale
-            depth_scale = torch.tensor(
-                depth_front.scale_factor, dtype=torch.float32, device=self.device
-            )
-            # SMPL body "size" proxy from first 3 betas (height, weight, build)
-            body_size_proxy = torch.sum(betas[:3] ** 2)
-            loss = loss + F.mse_loss(
-                body_size_proxy, depth_scale * torch.ones_like(body_size_proxy)
-            )
-
-        if depth_side is not None:
-            depth_scale = torch.tensor(
-                depth_side.scale_factor, dtype=torch.float32, device=self.device
-            )
-            body_size_proxy = torch.sum(betas[:3] ** 2)
-            loss = loss + F.mse_loss(
-                body_size_proxy, depth_scale * torch.ones_like(body_size_proxy)
-            )
+        # SMPL body "size" proxy from first 3 betas (height, weight, build),
+        # shared by both views
+        body_size_proxy = (betas[:3] ** 2).sum()
+
+        # Proxy: penalize betas that would produce a body size inconsistent
+        # with the depth-observed scale (plain float scales, so no per-call
+        # tensor construction)
+        loss = body_size_proxy.new_zeros(())
+        for depth in (depth_front, depth_side):
+            if depth is not None:
+                loss = loss + (body_size_proxy - depth.scale_factor) ** 2
 
         return loss
@@ -0,0 +1,6 @@
+"""Make the backend modules importable as top-level modules, as in main.py."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
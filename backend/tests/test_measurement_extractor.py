@@ -0,0 +1,49 @@
+"""Tests for mesh slicing in measurement_extractor."""
+
+import numpy as np
+import trimesh
+
+from measurement_extractor import (
+    _circumference_from_segments,
+    _select_loop,
+    _slice_mesh,
+)
+
+
+def _two_cylinders(radius: float = 0.08, gap: float = 0.3) -> trimesh.Trimesh:
+    """Two parallel y-axis cylinders side by side, like a pair of legs."""
+    # trimesh cylinders run along z; rotate them to stand along y
+    to_y_up = trimesh.transformations.rotation_matrix(-np.pi / 2, [1, 0, 0])
+    legs = []
+    for x in (-gap / 2, gap / 2):
+        leg = trimesh.creation.cylinder(radius=radius, height=0.6, sections=64)
+        leg.apply_transform(to_y_up)
+        leg.apply_translation([x, 0.3, 0.0])
+        legs.append(leg)
+    return trimesh.util.concatenate(legs)
+
+
+def test_select_loop_measures_only_the_landmark_loop():
+    radius = 0.08
+    mesh = _two_cylinders(radius=radius)
+    vertices = np.asarray(mesh.vertices)
+    faces = np.asarray(mesh.faces)
+
+    [(segments, edge_keys)] = _slice_mesh(vertices, faces, np.array([0.3]))
+    # The plane cuts both cylinders
+    expected = 2 * 64 * radius * np.sin(np.pi / 64)  # 64-gon perimeter
+    assert np.isclose(_circumference_from_segments(segments), 2 * expected)
+
+    for x in (-0.15, 0.15):
+        # Landmark on the surface of one cylinder
+        landmark = np.array([x - radius, 0.3, 0.0])
+        loop = _select_loop(segments, edge_keys, landmark)
+        assert np.isclose(_circumference_from_segments(loop), expected)
+        assert np.allclose(loop[:, :, 0].mean(), x, atol=1e-6)
+
+
+def test_select_loop_empty_section():
+    segments = np.zeros((0, 2, 3))
+    edge_keys = np.zeros((0, 2), dtype=np.int64)
+    loop = _select_loop(segments, edge_keys, np.zeros(3))
+    assert _circumference_from_segments(loop) == 0.0